@@ -0,0 +1,60 @@
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from pxr import Sdf
+from rtxremixtools.magicusda.core import create_usda_file
+
+
+def synthetic_materials(count, shader_type="AperturePBR_Opacity") -> dict:
+    # Every material gets the full set of texture inputs, which is the worst case for authoring
+    materials = {}
+    for i in range(count):
+        name = f"{i:016X}"
+        materials[f"mat_{name}"] = {
+            "texture": f"{name}.dds",
+            "shader_type": shader_type,
+            "inputs": {
+                "diffuse_texture": f".\\{name}.dds",
+                "emissive_mask_texture": f".\\{name}_emissive.dds",
+                "enable_emission": True,
+                "emissive_intensity": 5,
+                "metallic_texture": f".\\{name}_metallic.dds",
+                "normal_texture": f".\\{name}_normal.dds",
+                "reflectionroughness_texture": f".\\{name}_rough.dds",
+            },
+        }
+    return materials
+
+
+def time_backend(materials, backend, output_dir, count) -> [float, str]:
+    usda_file_path = os.path.join(output_dir, f"{backend}_{count}.usda")
+    start = time.perf_counter()
+    create_usda_file(usda_file_path, materials, backend)
+    elapsed = time.perf_counter() - start
+    return elapsed, usda_file_path
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare the usd and sdf material authoring backends of MagicUSDA.")
+    parser.add_argument("-n", "--sizes", type=int, nargs="+", default=[1000, 10000, 100000], help="Material counts to benchmark")
+    parser.add_argument("-k", "--keep", action="store_true", help="Keep the generated .usda files")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        output_dir = os.path.abspath("bench_output") if args.keep else temp_dir
+        os.makedirs(output_dir, exist_ok=True)
+
+        print(f"{'materials':>10} {'usd (s)':>10} {'sdf (s)':>10} {'speedup':>8}  output")
+        for count in args.sizes:
+            materials = synthetic_materials(count)
+            usd_time, usd_path = time_backend(materials, "usd", output_dir, count)
+            sdf_time, sdf_path = time_backend(materials, "sdf", output_dir, count)
+
+            # Both backends have to produce the same layer, not just similar timings
+            same = Sdf.Layer.FindOrOpen(usd_path).ExportToString() == Sdf.Layer.FindOrOpen(sdf_path).ExportToString()
+            print(f"{count:>10} {usd_time:>10.2f} {sdf_time:>10.2f} {usd_time / sdf_time:>7.1f}x  {'identical' if same else 'DIFFERENT'}")
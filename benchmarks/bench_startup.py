@@ -0,0 +1,69 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import corpus
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+# Modules that are expensive to import and should only be loaded by code paths that use them
+HEAVY_MODULES = ["pxr", "numpy", "xxhash"]
+
+
+def startup_cases(work_directory) -> list:
+    # (name, python arguments) for every command whose startup time is measured
+    layer_path = os.path.join(work_directory, "lights.usda")
+    corpus.generate_light_layer(layer_path, 10)
+    cases = [
+        ("python (baseline)", ["-c", "pass"]),
+        ("import pxr (reference)", ["-c", "from pxr import Usd, UsdGeom, UsdShade, Sdf"]),
+        ("rtxremixtools --help", ["-m", "rtxremixtools", "--help"]),
+    ]
+    for command in ["magicusda", "lightadjuster", "meshconvert"]:
+        cases.append((f"{command} --help", ["-m", "rtxremixtools", command, "--help"]))
+        # No arguments at all fails argument validation
+        cases.append((f"{command} bad arguments", ["-m", "rtxremixtools", command]))
+    cases.append(("lightadjuster text layer", ["-m", "rtxremixtools", "lightadjuster", layer_path, "-ai", "-p", "1"]))
+    return cases
+
+
+def time_command(arguments, repeat) -> [float, list]:
+    # Median wall time over `repeat` runs, plus the heavy modules the command imported
+    environment = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [ROOT, os.environ.get("PYTHONPATH")])))
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable] + arguments, env=environment, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        times.append(time.perf_counter() - start)
+
+    # -X importtime lists every imported module on stderr
+    imports = subprocess.run(
+        [sys.executable, "-X", "importtime"] + arguments, env=environment, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True
+    ).stderr
+    imported = [module for module in HEAVY_MODULES if f"| {module}\n" in imports or f"| {module}." in imports]
+    return statistics.median(times), imported
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure how long every rtxremixtools subcommand takes to start.")
+    parser.add_argument("-r", "--repeat", type=int, default=10, help="Runs per command, the median is reported")
+    parser.add_argument("-o", "--output", help="Write the results to this JSON file")
+    args = parser.parse_args()
+
+    results = {}
+    print(f"{'command':<30} {'median':>10}  heavy imports")
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for name, arguments in startup_cases(temp_dir):
+            seconds, imported = time_command(arguments, max(1, args.repeat))
+            results[name] = {"seconds": round(seconds, 4), "imports": imported}
+            print(f"{name:<30} {seconds * 1000:>8.0f}ms  {', '.join(imported) or '-'}")
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=2)
+        print(f"Wrote {args.output}")
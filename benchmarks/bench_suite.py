@@ -0,0 +1,204 @@
+import argparse
+import concurrent.futures
+import contextlib
+import datetime
+import json
+import multiprocessing
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import corpus
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+from rtxremixtools.instrumentation import peak_rss  # noqa: E402
+
+TOOLS = ["MagicUSDA", "LightAdjuster", "RemixMeshConvert"]
+
+# Corpus sizes for every scale. Textures are diffuse textures per format, each with all four companions.
+SCALES = {
+    "small": {"textures": 50, "texture_size": 256, "triangles": [10000, 100000], "lights": [1000, 10000]},
+    "medium": {"textures": 250, "texture_size": 512, "triangles": [100000, 1000000], "lights": [10000, 100000]},
+    "large": {"textures": 1000, "texture_size": 1024, "triangles": [1000000, 4000000], "lights": [100000, 500000]},
+}
+
+# MagicUSDA runs, as (name, extra arguments)
+MAGICUSDA_CASES = [
+    ("plain", []),
+    ("hashes", ["-g", "--no-cache"]),
+    ("multiple_files", ["-m"]),
+    ("hashes_multiple_files", ["-g", "-m", "--no-cache"]),
+]
+
+
+def run_magicusda(directory, extra_args) -> float:
+    # Run the whole magicusda subcommand, the implementation is imported up front so the import isn't timed
+    import xxhash  # noqa: F401
+    from rtxremixtools.cli import main
+    from rtxremixtools.magicusda import core  # noqa: F401
+
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        start = time.perf_counter()
+        main(["magicusda", "-d", directory] + extra_args)
+        return time.perf_counter() - start
+
+
+def run_light_adjuster(file_path, work_directory) -> float:
+    from rtxremixtools.lightadjuster.core import adjust_file
+
+    # adjust_file edits in place, so every run gets a fresh copy of the layer
+    layer_path = os.path.join(work_directory, "adjusted_" + os.path.basename(file_path))
+    shutil.copy(file_path, layer_path)
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        start = time.perf_counter()
+        adjust_file(layer_path, adjust_intensity=True, adjust_color_temperature=True, percentage=0.9)
+        return time.perf_counter() - start
+
+
+def run_mesh_convert(file_path, work_directory, extra_args) -> float:
+    from rtxremixtools.meshconvert.core import convert_file
+
+    output_path = os.path.join(work_directory, "converted_" + os.path.basename(file_path))
+    start = time.perf_counter()
+    convert_file(file_path, output_path, **extra_args)
+    return time.perf_counter() - start
+
+
+def measure(function, *args) -> dict:
+    # Runs in a fresh process, so the peak memory only covers this one benchmark
+    seconds = function(*args)
+    return {"seconds": seconds, "peak_rss_bytes": peak_rss()}
+
+
+def run_isolated(function, *args, repeat=1) -> dict:
+    # Best time and highest peak memory over `repeat` runs, each in its own spawned process
+    runs = []
+    for _ in range(repeat):
+        with concurrent.futures.ProcessPoolExecutor(1, mp_context=multiprocessing.get_context("spawn")) as executor:
+            runs.append(executor.submit(measure, function, *args).result())
+    peaks = [run["peak_rss_bytes"] for run in runs if run["peak_rss_bytes"] is not None]
+    return {
+        "seconds": min(run["seconds"] for run in runs),
+        "peak_rss_mb": round(max(peaks) / 2 ** 20, 1) if peaks else None,
+    }
+
+
+def record(results, name, measurement, items, unit, total_bytes=None) -> None:
+    measurement["items"] = items
+    measurement["unit"] = unit
+    measurement["items_per_second"] = round(items / measurement["seconds"], 1)
+    if total_bytes is not None:
+        measurement["mb_per_second"] = round(total_bytes / 2 ** 20 / measurement["seconds"], 1)
+    measurement["seconds"] = round(measurement["seconds"], 4)
+    results[name] = measurement
+    throughput = f"{measurement['items_per_second']:>12,.0f} {unit}/s"
+    peak = f"{measurement['peak_rss_mb']:>8.1f} MB" if measurement["peak_rss_mb"] is not None else "       n/a"
+    print(f"{name:<55} {measurement['seconds']:>9.3f}s {throughput} {peak}")
+
+
+def run_suite(scale, work_directory, repeat=1, tools=None) -> dict:
+    settings = SCALES[scale]
+    results = {}
+    tools = tools or TOOLS
+
+    if "MagicUSDA" in tools:
+        texture_directory = os.path.join(work_directory, "gameReadyAssets")
+        counts = dict.fromkeys(corpus.TEXTURE_FORMATS, settings["textures"])
+        stats = corpus.generate_texture_tree(texture_directory, counts, settings["texture_size"])
+        for case, extra_args in MAGICUSDA_CASES:
+            measurement = run_isolated(run_magicusda, texture_directory, extra_args, repeat=repeat)
+            record(results, f"MagicUSDA/{case}/textures={stats['diffuse']}", measurement, stats["diffuse"], "textures", stats["bytes"])
+
+    if "LightAdjuster" in tools:
+        # legacy layers are the ones the original -ai/-act edit, so only those compare like for like
+        # across the whole history. inputs layers cover the UsdLux names newer captures use.
+        for style in ["legacy", "inputs"]:
+            for lights in settings["lights"]:
+                file_path = os.path.join(work_directory, f"lights_{style}_{lights}.usda")
+                corpus.generate_light_layer(file_path, lights, style=style)
+                measurement = run_isolated(run_light_adjuster, file_path, work_directory, repeat=repeat)
+                record(results, f"LightAdjuster/adjust_file/{style}/lights={lights}", measurement, lights, "lights", os.path.getsize(file_path))
+
+    if "RemixMeshConvert" in tools:
+        for triangles in settings["triangles"]:
+            file_path = os.path.join(work_directory, f"mesh_{triangles}.usdc")
+            triangles = corpus.generate_mesh_file(file_path, triangles)
+            for case, extra_args in [("convert", {}), ("weld", {"weld": True})]:
+                measurement = run_isolated(run_mesh_convert, file_path, work_directory, extra_args, repeat=repeat)
+                record(results, f"RemixMeshConvert/{case}/triangles={triangles}", measurement, triangles, "triangles")
+
+    return results
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(baseline, results, threshold) -> list:
+    # Print the change against a baseline and return the benchmarks that got slower than threshold
+    regressions = []
+    print(f"\nCompared to {baseline.get('revision')} ({baseline.get('created')}):")
+    for name, measurement in results.items():
+        previous = baseline["results"].get(name)
+        if not previous:
+            print(f"  {name:<55} new")
+            continue
+        change = measurement["seconds"] / previous["seconds"] - 1
+        status = ""
+        if change > threshold:
+            status = "REGRESSION"
+            regressions.append(name)
+        elif change < -threshold:
+            status = "faster"
+        print(f"  {name:<55} {previous['seconds']:>9.3f}s -> {measurement['seconds']:>9.3f}s {change:>+8.1%} {status}")
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time MagicUSDA, LightAdjuster and RemixMeshConvert on a synthetic corpus.")
+    parser.add_argument("-s", "--scale", default="small", choices=SCALES, help="Size of the generated corpus")
+    parser.add_argument("-t", "--tools", nargs="+", choices=TOOLS, help="Only benchmark these tools")
+    parser.add_argument("-r", "--repeat", type=int, default=1, help="Run every benchmark this many times and keep the best time")
+    parser.add_argument("-o", "--output", help="Write the results to this JSON file, e.g. to use as a baseline later")
+    parser.add_argument("-c", "--compare", help="Compare the results with a JSON file written by --output")
+    parser.add_argument("--threshold", type=float, default=0.1, help="Slowdown that counts as a regression with --compare (0.1 = 10%%)")
+    parser.add_argument("--keep", help="Generate the corpus in this folder and keep it instead of using a temporary folder")
+    args = parser.parse_args()
+
+    print(f"{'benchmark':<55} {'time':>10} {'throughput':>21} {'peak RSS':>11}")
+    with tempfile.TemporaryDirectory() as temp_dir:
+        work_directory = os.path.abspath(args.keep) if args.keep else temp_dir
+        os.makedirs(work_directory, exist_ok=True)
+        results = run_suite(args.scale, work_directory, max(1, args.repeat), args.tools)
+
+    report = {
+        "created": datetime.datetime.now().isoformat(timespec="seconds"),
+        "revision": git_revision(),
+        "scale": args.scale,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2)
+        print(f"Wrote {args.output}")
+
+    if args.compare:
+        with open(args.compare) as file:
+            regressions = compare(json.load(file), results, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} benchmarks regressed by more than {args.threshold:.0%}")
+            sys.exit(1)
@@ -0,0 +1,195 @@
+import argparse
+import os
+
+import numpy as np
+
+# Synthetic test data for the benchmarks: gameReadyAssets texture trees, face-varying meshes
+# and light-heavy .usda layers. Everything is generated from a seed, so a corpus can be
+# recreated exactly on another machine instead of being shipped around.
+
+DDS_MAGIC = b"DDS "
+DDSD_CAPS_HEIGHT_WIDTH_PIXELFORMAT = 0x1 | 0x2 | 0x4 | 0x1000
+DDSD_PITCH = 0x8
+DDSD_LINEARSIZE = 0x80000
+DDSCAPS_TEXTURE = 0x1000
+DDPF_ALPHAPIXELS = 0x1
+DDPF_FOURCC = 0x4
+DDPF_RGB = 0x40
+DXGI_FORMAT_BC7_UNORM = 98
+D3D10_RESOURCE_DIMENSION_TEXTURE2D = 3
+
+# Block layout of every generated format, as (block width, block height, bytes per block)
+TEXTURE_FORMATS = {
+    "DXT1": (4, 4, 8),
+    "DXT5": (4, 4, 16),
+    "BC7": (4, 4, 16),
+    "RGBA": (1, 1, 4),
+}
+
+COMPANION_SUFFIXES = ["_normal", "_emissive", "_metallic", "_rough"]
+
+
+def dds_header(texture_format, width, height) -> bytes:
+    block_width, block_height, block_bytes = TEXTURE_FORMATS[texture_format]
+    blocks_wide = max(1, (width + block_width - 1) // block_width)
+    blocks_high = max(1, (height + block_height - 1) // block_height)
+
+    if texture_format == "RGBA":
+        flags = DDSD_CAPS_HEIGHT_WIDTH_PIXELFORMAT | DDSD_PITCH
+        pitch_or_linear_size = blocks_wide * block_bytes
+        pixel_format = [32, DDPF_RGB | DDPF_ALPHAPIXELS, 0, 32, 0x00FF0000, 0x0000FF00, 0x000000FF, 0xFF000000]
+    else:
+        flags = DDSD_CAPS_HEIGHT_WIDTH_PIXELFORMAT | DDSD_LINEARSIZE
+        pitch_or_linear_size = blocks_wide * blocks_high * block_bytes
+        fourcc = b"DX10" if texture_format == "BC7" else texture_format.encode("ascii")
+        pixel_format = [32, DDPF_FOURCC, int.from_bytes(fourcc, "little"), 0, 0, 0, 0, 0]
+
+    fields = [124, flags, height, width, pitch_or_linear_size, 0, 1] + [0] * 11 + pixel_format + [DDSCAPS_TEXTURE, 0, 0, 0, 0]
+    header = DDS_MAGIC + np.array(fields, dtype="<u4").tobytes()
+    if texture_format == "BC7":
+        header += np.array([DXGI_FORMAT_BC7_UNORM, D3D10_RESOURCE_DIMENSION_TEXTURE2D, 0, 1, 0], dtype="<u4").tobytes()
+    return header
+
+
+def write_dds(file_path, texture_format, width, height, rng) -> int:
+    # A single mip level filled with random data, so every texture hashes differently
+    block_width, block_height, block_bytes = TEXTURE_FORMATS[texture_format]
+    size = max(1, (width + block_width - 1) // block_width) * max(1, (height + block_height - 1) // block_height) * block_bytes
+    with open(file_path, "wb") as file:
+        file.write(dds_header(texture_format, width, height))
+        file.write(rng.bytes(size))
+    return os.path.getsize(file_path)
+
+
+def generate_texture_tree(directory, counts, size=256, companions=1.0, folders=1, seed=0) -> dict:
+    # Write a gameReadyAssets style tree. counts maps a format name to the number of diffuse
+    # textures in that format. Each diffuse texture is named after a 16 digit capture hash and
+    # gets the _normal/_emissive/_metallic/_rough companions with probability `companions`.
+    # Returns the number of diffuse textures, companion textures and bytes written.
+    rng = np.random.default_rng(seed)
+    stats = {"diffuse": 0, "companions": 0, "bytes": 0}
+    index = 0
+    for texture_format, count in counts.items():
+        for _ in range(count):
+            folder = os.path.join(directory, f"folder_{index % folders:03d}") if folders > 1 else directory
+            os.makedirs(folder, exist_ok=True)
+            name = f"{int(rng.integers(0, 2 ** 63)):016X}"
+            stats["bytes"] += write_dds(os.path.join(folder, f"{name}.dds"), texture_format, size, size, rng)
+            stats["diffuse"] += 1
+            if rng.random() < companions:
+                for suffix in COMPANION_SUFFIXES:
+                    stats["bytes"] += write_dds(os.path.join(folder, f"{name}{suffix}.dds"), texture_format, size, size, rng)
+                    stats["companions"] += 1
+            index += 1
+    return stats
+
+
+def generate_mesh_file(file_path, triangles, meshes=1, seed=0) -> int:
+    # Write grid meshes with face-varying normals and UVs, the layout RemixMeshConvert has to
+    # expand. Each mesh gets triangles // meshes triangles. Returns the total triangle count.
+    from pxr import Usd, UsdGeom, Sdf, Vt
+
+    rng = np.random.default_rng(seed)
+    stage = Usd.Stage.CreateNew(file_path)
+    world = UsdGeom.Xform.Define(stage, "/World")
+    stage.SetDefaultPrim(world.GetPrim())
+
+    total = 0
+    for mesh_index in range(meshes):
+        # A quad grid of columns x rows cells, two triangles per cell
+        cells = max(1, triangles // meshes // 2)
+        columns = max(1, int(np.sqrt(cells)))
+        rows = max(1, cells // columns)
+        grid_x, grid_y = np.meshgrid(np.arange(columns + 1, dtype=np.float32), np.arange(rows + 1, dtype=np.float32))
+        heights = rng.random(grid_x.shape, dtype=np.float32)
+        points = np.stack([grid_x.ravel(), grid_y.ravel(), heights.ravel()], axis=1)
+
+        corner = (np.arange(rows)[:, None] * (columns + 1) + np.arange(columns)[None, :]).ravel()
+        quads = np.stack([corner, corner + 1, corner + columns + 2, corner + columns + 1], axis=1)
+        face_vertex_indices = np.concatenate([quads[:, [0, 1, 2]], quads[:, [0, 2, 3]]], axis=1).reshape(-1).astype(np.int32)
+        face_count = len(face_vertex_indices) // 3
+
+        mesh = UsdGeom.Mesh.Define(stage, f"/World/mesh_{mesh_index:04d}")
+        mesh.CreatePointsAttr(Vt.Vec3fArray.FromNumpy(points))
+        mesh.CreateFaceVertexCountsAttr(Vt.IntArray.FromNumpy(np.full(face_count, 3, dtype=np.int32)))
+        mesh.CreateFaceVertexIndicesAttr(Vt.IntArray.FromNumpy(face_vertex_indices))
+
+        normals = rng.normal(size=(len(face_vertex_indices), 3)).astype(np.float32)
+        normals /= np.linalg.norm(normals, axis=1, keepdims=True)
+        mesh.CreateNormalsAttr(Vt.Vec3fArray.FromNumpy(normals))
+        mesh.SetNormalsInterpolation(UsdGeom.Tokens.faceVarying)
+
+        uvs = points[face_vertex_indices, :2] / np.array([columns, rows], dtype=np.float32)
+        st = UsdGeom.PrimvarsAPI(mesh).CreatePrimvar("st", Sdf.ValueTypeNames.TexCoord2fArray, UsdGeom.Tokens.faceVarying)
+        st.Set(Vt.Vec2fArray.FromNumpy(uvs))
+        total += face_count
+
+    stage.Save()
+    return total
+
+
+# Attribute naming of the generated lights. Older captures use the plain UsdLux names that
+# LightAdjuster's -ai/-act have always matched, newer ones the inputs: names.
+LIGHT_STYLES = ["legacy", "inputs", "mixed"]
+
+
+def generate_light_layer(file_path, lights, seed=0, style="mixed") -> int:
+    # Write a captured-level style .usda with many lights mixed in between mesh overrides.
+    # Written as text directly, which is how Remix captures look and much faster than the Usd API.
+    # style picks the attribute names, "mixed" alternates between legacy and inputs: lights.
+    rng = np.random.default_rng(seed)
+    light_types = ["SphereLight", "DistantLight", "RectLight", "DiskLight"]
+    with open(file_path, "w", newline="\n") as file:
+        file.write('#usda 1.0\n(\n    defaultPrim = "RootNode"\n)\n\nover "RootNode"\n{\n    over "lights"\n    {\n')
+        for index in range(lights):
+            light_type = light_types[index % len(light_types)]
+            red, green, blue = rng.random(3)
+            legacy = style == "legacy" or (style == "mixed" and index % 2 == 0)
+            prefix = "" if legacy else "inputs:"
+            file.write(
+                f'        def {light_type} "light_{index:08X}"\n'
+                '        {\n'
+                f'            color3f {prefix}color = ({red:.4f}, {green:.4f}, {blue:.4f})\n'
+                f'            float {prefix}colorTemperature = {int(rng.integers(2000, 9000))}\n'
+                f'            bool {prefix}enableColorTemperature = 1\n'
+                f'            float {prefix}intensity = {rng.random() * 1000:.3f}\n'
+                f'            float {prefix}radius = {rng.random():.4f}\n'
+                f'            double3 xformOp:translate = ({rng.random() * 100:.3f}, {rng.random() * 100:.3f}, {rng.random() * 100:.3f})\n'
+                '            uniform token[] xformOpOrder = ["xformOp:translate"]\n'
+                '        }\n'
+            )
+        file.write('    }\n}\n')
+    return lights
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a synthetic corpus for the RTXRemixTools benchmarks.")
+    parser.add_argument("output", help="Folder to write the corpus to")
+    parser.add_argument("--dxt1", type=int, default=100, help="Number of DXT1 diffuse textures")
+    parser.add_argument("--dxt5", type=int, default=100, help="Number of DXT5 diffuse textures")
+    parser.add_argument("--bc7", type=int, default=100, help="Number of BC7 diffuse textures")
+    parser.add_argument("--rgba", type=int, default=100, help="Number of uncompressed RGBA diffuse textures")
+    parser.add_argument("--texture-size", type=int, default=256, help="Width and height of every texture")
+    parser.add_argument("--companions", type=float, default=1.0, help="Fraction of diffuse textures that get normal, emissive, metallic and rough companions")
+    parser.add_argument("--folders", type=int, default=1, help="Spread the textures over this many subfolders")
+    parser.add_argument("--triangles", type=int, nargs="*", default=[100000], help="Triangle counts of the generated mesh files")
+    parser.add_argument("--meshes", type=int, default=1, help="Number of meshes the triangles of each mesh file are split over")
+    parser.add_argument("--lights", type=int, nargs="*", default=[10000], help="Light counts of the generated light layers")
+    parser.add_argument("--light-style", default="mixed", choices=LIGHT_STYLES, help="Attribute names of the generated lights: legacy (intensity), inputs (inputs:intensity) or mixed")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed")
+    args = parser.parse_args()
+
+    texture_directory = os.path.join(args.output, "gameReadyAssets")
+    counts = {"DXT1": args.dxt1, "DXT5": args.dxt5, "BC7": args.bc7, "RGBA": args.rgba}
+    stats = generate_texture_tree(texture_directory, counts, args.texture_size, args.companions, args.folders, args.seed)
+    print(f"Wrote {stats['diffuse']} diffuse and {stats['companions']} companion textures ({stats['bytes'] / 2 ** 20:.1f} MB) to {texture_directory}")
+
+    for triangles in args.triangles:
+        file_path = os.path.join(args.output, f"mesh_{triangles}.usdc")
+        generate_mesh_file(file_path, triangles, args.meshes, args.seed)
+        print(f"Wrote {file_path}")
+
+    for lights in args.lights:
+        file_path = os.path.join(args.output, f"lights_{lights}.usda")
+        generate_light_layer(file_path, lights, args.seed, args.light_style)
+        print(f"Wrote {file_path}")
@@ -0,0 +1,4 @@
+# RTX Remix tools: MagicUSDA, LightAdjuster and RemixMeshConvert as one package.
+# Importing the package is cheap, the USD libraries are only loaded by the modules that need them.
+
+__version__ = "1.0.0"
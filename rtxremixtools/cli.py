@@ -0,0 +1,30 @@
+import argparse
+
+from . import __version__
+from .lightadjuster import cli as lightadjuster_cli
+from .magicusda import cli as magicusda_cli
+from .meshconvert import cli as meshconvert_cli
+
+# Subcommands as (name, aliases, cli module, description). The cli modules only define
+# arguments, each one imports its tool when it runs, so startup stays fast.
+SUBCOMMANDS = [
+    ("magicusda", [], magicusda_cli, "Generate .usda files based on your gameReadyAssets folder"),
+    ("lightadjuster", ["lights"], lightadjuster_cli, "Adjust light intensity, color temperature or any other light attribute in USD layers"),
+    ("meshconvert", ["remixmeshconvert"], meshconvert_cli, "Convert meshes from face-varying to vertex interpolation so they work in Remix"),
+]
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="rtxremixtools", description="Tools for setting up RTX Remix mods.")
+    parser.add_argument("--version", action="version", version=f"%(prog)s {__version__}")
+    subparsers = parser.add_subparsers(dest="command", metavar="command", required=True)
+    for name, aliases, module, description in SUBCOMMANDS:
+        subparser = subparsers.add_parser(name, aliases=aliases, help=description, description=description)
+        module.add_arguments(subparser)
+        subparser.set_defaults(run=module.run, subparser=subparser)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return args.run(args, args.subparser) or 0
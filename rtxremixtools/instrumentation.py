@@ -0,0 +1,302 @@
+import atexit
+import contextlib
+import json
+import os
+import sys
+import threading
+import time
+
+# Shared per-stage instrumentation for MagicUSDA, LightAdjuster and RemixMeshConvert.
+#
+# Tools wrap their stages in `with instrumentation.stage("hashing", items=..., bytes_read=...)`
+# and add counts with instrumentation.count() and count_file(). Until enable() is called they
+# return straight away, so the calls can stay wired into production runs at no measurable cost.
+
+_NULL_STAGE = contextlib.nullcontext()
+
+_enabled = False
+_lock = threading.Lock()
+_stages = {}
+_tool = None
+_start = None
+_print_report = False
+_metrics_json = None
+_profiler = None
+_profile_path = None
+
+# Per-stage memory high-water marks. On Linux VmHWM is reset when a stage starts, elsewhere a
+# sampling thread polls the RSS while enabled. _active holds the running peak of every stage in
+# progress, each a one-item list so the sampler and nested stages can raise it.
+_SAMPLE_INTERVAL = 0.01
+_active = []
+_hwm_resets = False
+_run_peak = 0
+_sampler = None
+
+
+def peak_rss():
+    # Peak resident set size of this process in bytes, or None where it can't be measured
+    try:
+        import resource
+    except ImportError:
+        try:
+            import psutil
+            return psutil.Process().memory_info().peak_wset
+        except (ImportError, AttributeError):
+            return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Resetting VmHWM for the stage peaks resets ru_maxrss too, _run_peak keeps what it had reached
+    return max(peak if sys.platform == "darwin" else peak * 1024, _run_peak)
+
+
+def current_rss():
+    # Resident set size of this process right now in bytes, or None if it can't be measured here
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss
+    except ImportError:
+        pass
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def _read_hwm():
+    # VmHWM of this process in bytes, or None where /proc isn't available
+    try:
+        with open("/proc/self/status") as status:
+            for line in status:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+def _reset_hwm():
+    # Writing 5 to clear_refs resets VmHWM to the current RSS (Linux 4.0 and later)
+    try:
+        with open("/proc/self/clear_refs", "w") as clear_refs:
+            clear_refs.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def _sample_rss():
+    while _enabled and not _hwm_resets:
+        rss = current_rss()
+        if rss is not None:
+            with _lock:
+                for peak in _active:
+                    peak[0] = max(peak[0], rss)
+        time.sleep(_SAMPLE_INTERVAL)
+
+
+def _start_peak_tracking():
+    # Pick how stage peaks are measured, called once collecting starts in a process
+    global _hwm_resets, _run_peak, _sampler
+    _active.clear()
+    _run_peak = 0
+    _hwm_resets = _read_hwm() is not None and _reset_hwm()
+    if not _hwm_resets and current_rss() is not None and (_sampler is None or not _sampler.is_alive()):
+        _sampler = threading.Thread(target=_sample_rss, name="instrumentation-rss", daemon=True)
+        _sampler.start()
+
+
+def _begin_peak():
+    global _run_peak
+    with _lock:
+        if _hwm_resets:
+            # Stages still running (outer or in other threads) keep the peak reached so far
+            hwm = _read_hwm() or 0
+            _run_peak = max(_run_peak, hwm)
+            for peak in _active:
+                peak[0] = max(peak[0], hwm)
+            _reset_hwm()
+            peak = [_read_hwm() or 0]
+        else:
+            peak = [current_rss() or 0]
+        _active.append(peak)
+    return peak
+
+
+def _end_peak(peak):
+    with _lock:
+        # By identity, stages with the same peak so far compare equal
+        _active[:] = [other for other in _active if other is not peak]
+        sample = _read_hwm() if _hwm_resets else current_rss()
+        return max(peak[0], sample or 0) or None
+
+
+def enabled():
+    return _enabled
+
+
+def _record(name, seconds=0.0, calls=0, items=0, bytes_read=0, bytes_written=0, rss=None, peak=None):
+    with _lock:
+        record = _stages.setdefault(
+            name, {"calls": 0, "seconds": 0.0, "items": 0, "bytes_read": 0, "bytes_written": 0,
+                   "end_rss": None, "peak_rss": None}
+        )
+        record["calls"] += calls
+        record["seconds"] += seconds
+        record["items"] += items
+        record["bytes_read"] += bytes_read
+        record["bytes_written"] += bytes_written
+        # The highest RSS any call of the stage ended with, and the highest it reached while running
+        if rss is not None and (record["end_rss"] is None or rss > record["end_rss"]):
+            record["end_rss"] = rss
+        if peak is not None and (record["peak_rss"] is None or peak > record["peak_rss"]):
+            record["peak_rss"] = peak
+
+
+@contextlib.contextmanager
+def _timed_stage(name, items, bytes_read, bytes_written):
+    peak = _begin_peak()
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - start
+        _record(name, seconds, 1, items, bytes_read, bytes_written, current_rss(), _end_peak(peak))
+
+
+def stage(name, items=0, bytes_read=0, bytes_written=0):
+    # Time a stage of work. Stages with the same name are summed, so per-item stages
+    # like mesh conversion end up as one row with a call count.
+    if not _enabled:
+        return _NULL_STAGE
+    return _timed_stage(name, items, bytes_read, bytes_written)
+
+
+def count(name, items=0, bytes_read=0, bytes_written=0):
+    # Add counts to a stage without timing anything, for values only known afterwards
+    if _enabled:
+        _record(name, items=items, bytes_read=bytes_read, bytes_written=bytes_written)
+
+
+def count_file(name, file_path, written=False):
+    # Add the size of a file to the bytes read (or written) of a stage. The file is only
+    # stat'ed while enabled, so callers don't need to guard this themselves.
+    if _enabled:
+        size = os.path.getsize(file_path)
+        if written:
+            _record(name, bytes_written=size)
+        else:
+            _record(name, bytes_read=size)
+
+
+def snapshot():
+    # Stage records of this process, for worker processes to hand back to the parent
+    with _lock:
+        return {name: dict(record) for name, record in _stages.items()}
+
+
+def merge(stages):
+    # Fold the snapshot of a worker process into this one
+    if _enabled and stages:
+        for name, record in stages.items():
+            _record(
+                name, record["seconds"], record["calls"], record["items"],
+                record["bytes_read"], record["bytes_written"], record["end_rss"], record["peak_rss"],
+            )
+
+
+def enable(tool, report=True, metrics_json=None, profile_path=None):
+    # Start collecting. The report and metrics file are written when the process exits.
+    global _enabled, _tool, _start, _print_report, _metrics_json, _profiler, _profile_path
+    _stages.clear()
+    _enabled = True
+    _tool = tool
+    _start = time.perf_counter()
+    _print_report = report
+    _metrics_json = metrics_json
+    _profile_path = profile_path
+    if profile_path:
+        import cProfile
+        _profiler = cProfile.Profile()
+        _profiler.enable()
+    _start_peak_tracking()
+    atexit.register(finish)
+
+
+def enable_worker(enable_metrics):
+    # Called at the start of work in a worker process. Forked workers inherit the parent's
+    # records and spawned ones start disabled, so start from a clean, report-free state.
+    global _enabled, _print_report, _metrics_json, _profiler, _profile_path
+    _stages.clear()
+    _enabled = enable_metrics
+    _print_report = False
+    _metrics_json = None
+    _profiler = None
+    _profile_path = None
+    if enable_metrics:
+        _start_peak_tracking()
+
+
+def add_arguments(parser):
+    parser.add_argument("--profile", nargs="?", const="", metavar="PATH", help="Print the time, bytes, item counts and memory use of every stage when done. With a PATH, also write a cProfile dump there")
+    parser.add_argument("--metrics-json", metavar="PATH", help="Write the per-stage metrics to this JSON file")
+
+
+def setup(args, tool):
+    # Enable instrumentation if any of the flags from add_arguments were given
+    if args.profile is not None or args.metrics_json:
+        enable(tool, args.profile is not None, args.metrics_json, args.profile or None)
+
+
+def metrics():
+    # ru_maxrss is only updated lazily, so it can trail the latest current_rss() sample
+    stages = snapshot().values()
+    samples = [peak_rss(), current_rss()] + [record[key] for record in stages for key in ("end_rss", "peak_rss")]
+    rss = max((sample for sample in samples if sample is not None), default=None)
+    return {
+        "tool": _tool,
+        "argv": sys.argv[1:],
+        "wall_seconds": round(time.perf_counter() - _start, 6),
+        "peak_rss_mb": round(rss / 2 ** 20, 1) if rss is not None else None,
+        "stages": {
+            name: {
+                "calls": record["calls"],
+                "seconds": round(record["seconds"], 6),
+                "items": record["items"],
+                "bytes_read": record["bytes_read"],
+                "bytes_written": record["bytes_written"],
+                "peak_rss_mb": round(record["peak_rss"] / 2 ** 20, 1) if record["peak_rss"] is not None else None,
+                "end_rss_mb": round(record["end_rss"] / 2 ** 20, 1) if record["end_rss"] is not None else None,
+            }
+            for name, record in snapshot().items()
+        },
+    }
+
+
+def print_report(report):
+    print(f"\n{report['tool']} finished in {report['wall_seconds']:.2f}s, peak memory {report['peak_rss_mb']} MB")
+    print(f"  {'stage':<22} {'calls':>7} {'time':>10} {'items':>10} {'MB read':>10} {'MB written':>11} {'peak MB':>9} {'end RSS MB':>11}")
+    for name, record in report["stages"].items():
+        print(
+            f"  {name:<22} {record['calls']:>7} {record['seconds']:>9.3f}s {record['items']:>10} "
+            f"{record['bytes_read'] / 2 ** 20:>10.1f} {record['bytes_written'] / 2 ** 20:>11.1f} {record['peak_rss_mb'] or 0:>9.1f} {record['end_rss_mb'] or 0:>11.1f}"
+        )
+
+
+def finish():
+    global _enabled, _profiler
+    if not _enabled:
+        return
+    if _profiler:
+        _profiler.disable()
+        _profiler.dump_stats(_profile_path)
+        _profiler = None
+    report = metrics()
+    if _print_report:
+        print_report(report)
+        if _profile_path:
+            print(f"cProfile stats written to {_profile_path}")
+    if _metrics_json:
+        with open(_metrics_json, "w") as file:
+            json.dump(report, file, indent=2)
+    _enabled = False
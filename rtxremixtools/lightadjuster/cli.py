@@ -0,0 +1,46 @@
+import os
+
+from .. import instrumentation
+
+# Argument parsing for the lightadjuster subcommand. Text layers never need the USD
+# libraries, only binary crate layers import them when they are edited.
+
+
+def add_arguments(parser):
+    parser.add_argument('file_path', type=str, nargs='+', help='The files to modify. Directories are searched recursively for .usda/.usd/.usdc layers and glob patterns are expanded.')
+    parser.add_argument('-s', '--start-line', type=int, default=1, help='The line number to start modifying at (text layers only).')
+    parser.add_argument('-l', '--log', action='store_true', help='Whether to print a log of the changed lines.')
+    parser.add_argument('-ai', '--adjust-intensity', action='store_true', help='Whether to adjust the intensity value.')
+    parser.add_argument('-act', '--adjust-color-temperature', action='store_true', help='Whether to adjust the color temperature value.')
+    parser.add_argument('-p', '--percentage', type=float, help='The percentage to adjust the value by.')
+    parser.add_argument('--set', dest='edits', action='append', default=[], metavar='EDIT', help='An attribute edit like intensity*=0.8, exposure+=1 or color=(1,0.5,0.2). Can be given multiple times.')
+    parser.add_argument('-t', '--light-type', dest='light_types', action='append', metavar='TYPE', help='Only edit lights of this type, e.g. SphereLight or *Light. Can be given multiple times.')
+    parser.add_argument('--prim-path', dest='prim_paths', action='append', metavar='GLOB', help='Only edit prims whose path matches this glob, e.g. /RootNode/lights/*. Can be given multiple times.')
+    parser.add_argument('-j', '--jobs', type=int, help='Number of worker processes used when adjusting several layers (defaults to the CPU count).')
+    instrumentation.add_arguments(parser)
+
+
+def run(args, parser):
+    from .core import adjust_batch, adjust_file, input_aliases, legacy_edits, parse_edit
+
+    if (args.adjust_intensity or args.adjust_color_temperature) and args.percentage is None:
+        parser.error('-ai and -act require -p')
+    if args.jobs is not None and args.jobs < 1:
+        parser.error('--jobs must be at least 1')
+    try:
+        edits = input_aliases([parse_edit(edit) for edit in args.edits])
+    except ValueError as e:
+        parser.error(str(e))
+
+    instrumentation.setup(args, 'LightAdjuster')
+    if len(args.file_path) == 1 and os.path.isfile(args.file_path[0]):
+        try:
+            adjust_file(args.file_path[0], args.start_line, args.log, args.adjust_intensity, args.adjust_color_temperature, args.percentage, edits, args.light_types, args.prim_paths)
+        except ValueError as e:
+            parser.exit(1, f'Error: {e}\n')
+    else:
+        edits = legacy_edits(edits, args.adjust_intensity, args.adjust_color_temperature, args.percentage)
+        if not edits:
+            parser.error('Nothing to adjust, use --set, -ai or -act')
+        if not adjust_batch(args.file_path, edits, args.start_line, args.log, args.light_types, args.prim_paths, args.jobs):
+            return 1
@@ -0,0 +1,466 @@
+import concurrent.futures
+import fnmatch
+import glob
+import os
+import re
+import tempfile
+
+from .. import instrumentation
+
+# Operators accepted by --set, applied component-wise to vector values like colors
+OPERATORS = {
+    '*=': lambda old, operand: old * operand,
+    '+=': lambda old, operand: old + operand,
+    '-=': lambda old, operand: old - operand,
+    '=': lambda old, operand: operand,
+}
+INTEGER_TYPES = ('int', 'uint', 'int64', 'uint64')
+
+EDIT_PATTERN = re.compile(r'^\s*([\w:]+)\s*(\*=|\+=|-=|=)\s*(.+?)\s*$')
+PRIM_PATTERN = re.compile(r'^\s*(?:def|over|class)\s+(?:(\w+)\s+)?"([^"]*)"')
+STRING_PATTERN = re.compile(r'"(?:[^"\\]|\\.)*"|@[^@]*@')
+
+USD_EXTENSIONS = ('.usda', '.usd', '.usdc')
+
+# Characters read per regex pass when no prim filters are given, extended to the next line break
+CHUNK_SIZE = 1 << 20
+
+
+def parse_value(text):
+    # Scalars become floats, tuples like (1, 0.5, 0.2) become tuples of floats
+    text = text.strip()
+    if text.startswith('(') and text.endswith(')'):
+        return tuple(float(component) for component in text[1:-1].split(','))
+    return float(text)
+
+
+def format_value(value, type_name):
+    if isinstance(value, tuple):
+        return '(' + ', '.join(format_value(component, type_name) for component in value) + ')'
+    if type_name in INTEGER_TYPES:
+        return str(int(round(value)))
+    return str(value)
+
+
+def apply_operator(operator, old_value, operand):
+    if isinstance(old_value, tuple):
+        operands = operand if isinstance(operand, tuple) else (operand,) * len(old_value)
+        if len(operands) != len(old_value):
+            raise ValueError(f'Cannot apply {operand} to a value with {len(old_value)} components')
+        return tuple(OPERATORS[operator](old, new) for old, new in zip(old_value, operands))
+    if isinstance(operand, tuple):
+        raise ValueError(f'Cannot apply {operand} to a scalar value')
+    return OPERATORS[operator](old_value, operand)
+
+
+def matches_filters(prim_path, type_name, light_types=None, prim_paths=None):
+    if light_types and not any(fnmatch.fnmatchcase(type_name, pattern) for pattern in light_types):
+        return False
+    if prim_paths and not any(fnmatch.fnmatchcase(prim_path, pattern) for pattern in prim_paths):
+        return False
+    return True
+
+
+def group_edits(edits):
+    # Map each attribute name to the (operator, operand) pairs to apply to it, in order
+    grouped = {}
+    for attribute, operator, operand in edits:
+        grouped.setdefault(attribute, []).append((operator, operand))
+    return grouped
+
+
+def input_aliases(edits):
+    # A --set edit for "intensity" also applies to the UsdLux "inputs:intensity" attribute.
+    # -ai and -act don't go through this, they only edit the plain names like they always have.
+    aliased = []
+    for attribute, operator, operand in edits:
+        aliased.append((attribute, operator, operand))
+        if not attribute.startswith('inputs:'):
+            aliased.append(('inputs:' + attribute, operator, operand))
+    return aliased
+
+
+def parse_edit(text):
+    # Parse a --set expression like "intensity*=0.8" into (attribute, operator, operand)
+    match = EDIT_PATTERN.match(text)
+    if not match:
+        raise ValueError(f'Invalid edit "{text}", expected e.g. intensity*=0.8')
+    attribute, operator, operand = match.groups()
+    return attribute, operator, parse_value(operand)
+
+
+class LightEditor:
+    # Applies a list of edits to the attribute lines of a .usda file in a single pass.
+    # It follows the def/over/class blocks while scanning so that edits can be limited
+    # to certain light types or prim paths without loading the layer through pxr.
+
+    def __init__(self, edits, light_types=None, prim_paths=None, log=None):
+        self.edits = group_edits(edits)
+        names = '|'.join(re.escape(attribute) for attribute in sorted(self.edits, key=len, reverse=True))
+        # Matches a whole attribute line. It never crosses a line break, so it works on single
+        # lines as well as on whole chunks of the file in MULTILINE mode.
+        self.attribute_pattern = re.compile(
+            r'^(?P<prefix>[ \t]*(?:(?:uniform|custom)[ \t]+)*(?P<type>\w+)[ \t]+(?P<name>' + names
+            + r')[ \t]*=[ \t]*)(?P<value>[^\n]*?)[ \t]*$',
+            re.MULTILINE,
+        )
+        # Cheap search for the attribute names before the full pattern, most lines don't mention any
+        self.mentions_attribute = re.compile(names).search
+        self.light_types = light_types
+        self.prim_paths = prim_paths
+        # Without filters every prim matches, so the prim hierarchy doesn't need to be followed
+        self.track = bool(light_types or prim_paths)
+        self.log = log
+        self.lines_changed = 0
+        self.prim_stack = []  # (name, type name, brace depth of the prim body)
+        self.pending_prim = None
+        self.brace_depth = 0
+        self.paren_depth = 0
+
+    def current_prim(self):
+        if not self.prim_stack:
+            return '/', ''
+        return '/' + '/'.join(name for name, _, _ in self.prim_stack), self.prim_stack[-1][1]
+
+    def track_prims(self, line):
+        if 'def' in line or 'over' in line or 'class' in line:
+            match = PRIM_PATTERN.match(line)
+            if match:
+                self.pending_prim = (match.group(2), match.group(1) or '')
+        if not ('{' in line or '}' in line or '(' in line or ')' in line):
+            return
+        if '"' in line or '@' in line:
+            line = STRING_PATTERN.sub('', line)
+        opening, closing = line.count('{'), line.count('}')
+        parens = line.count('(') - line.count(')')
+        if opening and closing or parens and (opening or closing):
+            # Order matters on lines like `def Scope "a" {}` or `) {`, walk them character by character
+            self.track_chars(line)
+            return
+        # Braces inside the metadata block of a prim, e.g. customData = {...}, are not its body
+        self.paren_depth += parens
+        if opening:
+            if self.pending_prim and self.paren_depth == 0:
+                self.prim_stack.append(self.pending_prim + (self.brace_depth,))
+                self.pending_prim = None
+            self.brace_depth += opening
+        for _ in range(closing):
+            self.brace_depth -= 1
+            if self.prim_stack and self.prim_stack[-1][2] == self.brace_depth:
+                self.prim_stack.pop()
+
+    def track_chars(self, line):
+        for char in line:
+            if char == '(':
+                self.paren_depth += 1
+            elif char == ')':
+                self.paren_depth -= 1
+            elif char == '{':
+                if self.pending_prim and self.paren_depth == 0:
+                    self.prim_stack.append(self.pending_prim + (self.brace_depth,))
+                    self.pending_prim = None
+                self.brace_depth += 1
+            elif char == '}':
+                self.brace_depth -= 1
+                if self.prim_stack and self.prim_stack[-1][2] == self.brace_depth:
+                    self.prim_stack.pop()
+
+    def prim_matches(self):
+        prim_path, type_name = self.current_prim()
+        return matches_filters(prim_path, type_name, self.light_types, self.prim_paths)
+
+    def edit_file(self, file, write, start_line=1):
+        # Writes every line of file with the matching edits applied
+        if self.track:
+            for line in self.edit_lines(file, start_line):
+                write(line)
+            return
+
+        # Without filters no line depends on the ones before it, so the file is edited in chunks
+        # of whole lines and Python code only runs for the lines that mention an edited name
+        line_number = 1
+        while line_number < start_line:
+            line = file.readline()
+            if not line:
+                return
+            write(line)
+            line_number += 1
+
+        while True:
+            chunk = file.read(CHUNK_SIZE)
+            if not chunk:
+                return
+            chunk += file.readline()
+            write(self.edit_chunk(chunk, line_number))
+            line_number += chunk.count('\n')
+
+    def find_names(self, chunk):
+        # Offsets of every occurrence of an edited attribute name. str.find is far faster
+        # than any regex scan over the whole chunk, the full pattern then only runs on these lines.
+        offsets = []
+        for name in self.edits:
+            offset = chunk.find(name)
+            while offset >= 0:
+                offsets.append(offset)
+                offset = chunk.find(name, offset + len(name))
+        offsets.sort()
+        return offsets
+
+    def edit_chunk(self, chunk, line_number):
+        # Returns chunk, a run of whole lines starting at line_number, with the edits applied
+        position = [0, line_number]  # An offset in chunk and its line number, advanced on demand
+
+        def line_at(offset):
+            position[1] += chunk.count('\n', position[0], offset)
+            position[0] = offset
+            return position[1]
+
+        pieces = []
+        copied = 0  # Offset up to which chunk has been copied into pieces
+        line_end = 0
+        for offset in self.find_names(chunk):
+            if offset < line_end:
+                continue  # Another name on a line that was already handled
+            line_start = chunk.rfind('\n', 0, offset) + 1
+            line_end = chunk.find('\n', offset)
+            if line_end < 0:
+                line_end = len(chunk)
+            match = self.attribute_pattern.match(chunk, line_start, line_end)
+            if match:
+                new_text = self.edited_text(match, line_at)
+                if new_text is not None:
+                    pieces.append(chunk[copied:line_start])
+                    pieces.append(new_text)
+                    copied = match.end()
+        if not pieces:
+            return chunk
+        pieces.append(chunk[copied:])
+        return ''.join(pieces)
+
+    def edit_lines(self, lines, start_line=1):
+        # Yields every line with the matching edits applied, following the prim hierarchy
+        # for the -t and --prim-path filters
+        mentions_attribute = self.mentions_attribute
+        for i, line in enumerate(lines):
+            self.track_prims(line)
+            if mentions_attribute(line) and i + 1 >= start_line:
+                match = self.attribute_pattern.match(line)
+                if match and self.prim_matches():
+                    new_text = self.edited_text(match, lambda offset: i + 1)
+                    if new_text is not None:
+                        line = new_text + line[match.end():]
+            yield line
+
+    def edited_text(self, match, line_at):
+        # Returns the attribute line of match with all its edits applied, or None if it doesn't
+        # change. line_at maps an offset to its line number for log and error messages.
+        old_text, prefix, type_name, name, value = match.group(0, 'prefix', 'type', 'name', 'value')
+        try:
+            value = parse_value(value)
+        except ValueError:
+            return None  # Not a plain number or tuple, e.g. None or a connection
+        for operator, operand in self.edits[name]:
+            try:
+                value = apply_operator(operator, value, operand)
+            except ValueError as e:
+                raise ValueError(f'Line {line_at(match.start())}: {e}') from None
+
+        new_text = f"{prefix}{format_value(value, type_name)}"
+        if new_text == old_text:
+            return None
+        if self.log:
+            self.log(f'Line {line_at(match.start())}: {old_text.strip()} -> {new_text.strip()}')
+        self.lines_changed += 1
+        return new_text
+
+
+def is_text_layer(file_path):
+    # .usd files can hold either format, text layers always start with the #usda magic
+    if file_path.endswith('.usda'):
+        return True
+    if file_path.endswith('.usdc'):
+        return False
+    with open(file_path, 'rb') as file:
+        return file.read(5) == b'#usda'
+
+
+def adjust_text_file(file_path, edits, start_line=1, light_types=None, prim_paths=None, log=None):
+    # Write into a temporary file next to the original and swap it in at the end,
+    # so a crash halfway through never leaves a truncated layer behind
+    directory = os.path.dirname(os.path.abspath(file_path))
+    temp_file = tempfile.NamedTemporaryFile('w', dir=directory, prefix='.LightAdjuster-', suffix='.tmp', delete=False)
+    editor = LightEditor(edits, light_types, prim_paths, log)
+    try:
+        with open(file_path, 'r') as file, temp_file:
+            # .file is the plain file object, its methods skip the per-call wrapper of the temporary file
+            editor.edit_file(file, temp_file.file.write, start_line)
+        # Keep the permissions of the original file, the temporary file is created private
+        os.chmod(temp_file.name, os.stat(file_path).st_mode)
+        os.replace(temp_file.name, file_path)
+    except BaseException:
+        os.remove(temp_file.name)
+        raise
+    return editor.lines_changed
+
+
+def adjust_crate_file(file_path, edits, light_types=None, prim_paths=None, log=None):
+    # Binary crate layers can't be edited as text, so edit the attribute specs through Sdf.
+    # pxr is only imported here, the text path doesn't need it.
+    from pxr import Sdf
+
+    grouped_edits = group_edits(edits)
+    layer = Sdf.Layer.FindOrOpen(file_path)
+    prim_specs = []
+    layer.Traverse(Sdf.Path.absoluteRootPath, lambda path: prim_specs.append(path) if path.IsPrimPath() else None)
+
+    values_changed = 0
+    for prim_path in prim_specs:
+        prim_spec = layer.GetPrimAtPath(prim_path)
+        if not matches_filters(str(prim_path), prim_spec.typeName, light_types, prim_paths):
+            continue
+        for attribute_spec in prim_spec.attributes:
+            attribute_edits = grouped_edits.get(attribute_spec.name)
+            old_value = attribute_spec.default if attribute_edits else None
+            if old_value is None:
+                continue
+            is_vector = not isinstance(old_value, (int, float))
+            value = tuple(old_value) if is_vector else float(old_value)
+            for operator, operand in attribute_edits:
+                try:
+                    value = apply_operator(operator, value, operand)
+                except ValueError as e:
+                    raise ValueError(f'{attribute_spec.path}: {e}') from None
+            if is_vector:
+                value = type(old_value)(*value)
+            elif isinstance(old_value, int):
+                value = int(round(value))
+            if value == old_value:
+                continue
+            attribute_spec.default = value
+            values_changed += 1
+            if log:
+                log(f'{attribute_spec.path}: {old_value} -> {value}')
+
+    if values_changed:
+        layer.Save()
+    return values_changed
+
+
+def adjust_layer(file_path, edits, start_line=1, light_types=None, prim_paths=None, log=None):
+    instrumentation.count_file('light editing', file_path)
+    with instrumentation.stage('light editing'):
+        if is_text_layer(file_path):
+            values_changed = adjust_text_file(file_path, edits, start_line, light_types, prim_paths, log)
+        else:
+            values_changed = adjust_crate_file(file_path, edits, light_types, prim_paths, log)
+    instrumentation.count('light editing', items=values_changed)
+    if values_changed:
+        instrumentation.count_file('light editing', file_path, written=True)
+    return values_changed
+
+
+def legacy_edits(edits=None, adjust_intensity=False, adjust_color_temperature=False, percentage=None):
+    # -ai and -act are shorthands for multiplying by -p
+    edits = list(edits or [])
+    if adjust_intensity:
+        edits.append(('intensity', '*=', percentage))
+    if adjust_color_temperature:
+        edits.append(('colorTemperature', '*=', percentage))
+    return edits
+
+
+def adjust_file(file_path, start_line=1, log_changes=False, adjust_intensity=False, adjust_color_temperature=False, percentage=None, edits=None, light_types=None, prim_paths=None):
+    edits = legacy_edits(edits, adjust_intensity, adjust_color_temperature, percentage)
+    if not edits:
+        print('Nothing to adjust.')
+        return 0
+
+    log_file = open('changes.log', 'a') if log_changes else None
+
+    def log(log_line):
+        print(log_line)
+        log_file.write(log_line + '\n')
+
+    try:
+        lines_changed = adjust_layer(file_path, edits, start_line, light_types, prim_paths, log if log_file else None)
+    finally:
+        if log_file:
+            log_file.close()
+    print(f'Completed! {lines_changed} lines changed.')
+    return lines_changed
+
+
+def find_layers(paths):
+    # Expand files, directories (recursively) and glob patterns into a list of USD layers.
+    # Also returns the paths that don't exist or didn't match any layer.
+    layers = []
+    unmatched = []
+    for path in paths:
+        matches = glob.glob(path, recursive=True) if glob.has_magic(path) else [path]
+        found = len(layers)
+        for match in matches:
+            if os.path.isdir(match):
+                for root, dirs, files in os.walk(match):
+                    layers.extend(os.path.join(root, file) for file in sorted(files) if file.endswith(USD_EXTENSIONS))
+            elif os.path.isfile(match):
+                layers.append(match)
+        if len(layers) == found:
+            unmatched.append(path)
+    return list(dict.fromkeys(layers)), unmatched
+
+
+def adjust_layer_worker(file_path, edits, start_line, light_types, prim_paths, log_changes, metrics=False):
+    # Runs in a worker process. Log lines and stage metrics are returned instead of written,
+    # so the parent can write one ordered changes.log and metrics report for the whole batch.
+    instrumentation.enable_worker(metrics)
+    log_lines = []
+    try:
+        values_changed = adjust_layer(file_path, edits, start_line, light_types, prim_paths, log_lines.append if log_changes else None)
+        return file_path, values_changed, log_lines, None, instrumentation.snapshot()
+    except Exception as e:
+        return file_path, 0, log_lines, f'{type(e).__name__}: {e}', instrumentation.snapshot()
+
+
+def adjust_batch(paths, edits, start_line=1, log_changes=False, light_types=None, prim_paths=None, jobs=None):
+    with instrumentation.stage('directory walk'):
+        layers, unmatched = find_layers(paths)
+    instrumentation.count('directory walk', items=len(layers))
+    for path in unmatched:
+        print(f'Error: {path} does not exist or contains no USD layers.')
+    if not layers:
+        print('No USD layers found.')
+        return False
+
+    results = {}
+    failures = {}
+    with concurrent.futures.ProcessPoolExecutor(max_workers=jobs) as executor:
+        futures = [
+            executor.submit(adjust_layer_worker, layer, edits, start_line, light_types, prim_paths, log_changes, instrumentation.enabled())
+            for layer in layers
+        ]
+        log_file = open('changes.log', 'a') if log_changes else None
+        try:
+            for future in futures:
+                file_path, values_changed, log_lines, error, stages = future.result()
+                instrumentation.merge(stages)
+                for log_line in log_lines:
+                    log_line = f'{file_path}: {log_line}'
+                    print(log_line)
+                    log_file.write(log_line + '\n')
+                if error:
+                    failures[file_path] = error
+                else:
+                    results[file_path] = values_changed
+        finally:
+            if log_file:
+                log_file.close()
+
+    # Aggregated summary for the whole batch
+    print(f'Processed {len(layers)} layers:')
+    for file_path, values_changed in results.items():
+        if values_changed:
+            print(f'  - {file_path}: {values_changed} values changed')
+    for file_path, error in failures.items():
+        print(f'  - {file_path}: FAILED ({error})')
+    print(f'Completed! {sum(results.values())} values changed in {sum(1 for count in results.values() if count)} layers, {len(failures)} failed.')
+    return not failures and not unmatched
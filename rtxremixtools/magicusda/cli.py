@@ -0,0 +1,39 @@
+import os
+
+from .. import instrumentation
+
+# Argument parsing for the magicusda subcommand. Kept apart from core so --help and
+# argument errors don't pay for importing the USD libraries.
+
+
+def add_arguments(parser):
+    parser.add_argument("-d", "--directory", required=True, help="Path to directory")
+    parser.add_argument("-o", "--output", default="mod", help="Output file name")
+    parser.add_argument("-g", "--generate-hashes", action="store_true", help="Generates hashes for file names before the suffix")
+    parser.add_argument("-m", "--multiple-files", action="store_true", help="Save multiple .usda files, one for each suffix type (except for diffuse)")
+    parser.add_argument("-a", "--add-sublayers", action="store_true", help="Add sublayers made with -m to the mod.usda file. This argument only modifies the mod.usda file and does not affect any custom USDA file specified by the -o argument.")
+    parser.add_argument("-s", "--shader-type", default="AperturePBR_Opacity", choices=["AperturePBR_Opacity", "AperturePBR_Translucent"], help="Shader type")
+    parser.add_argument("-r", "--reference-directory", help="Path to reference directory for diffuse texture hashes")
+    parser.add_argument("-i", "--incremental", action="store_true", help="Update existing .usda files in place, only adding, updating or removing materials that changed")
+    parser.add_argument("-p", "--prototype", action="store_true", help="Author one shared prototype material per shader type and have every material inherit from it, so only texture inputs are written per material")
+    parser.add_argument("-b", "--backend", default="usd", choices=["usd", "sdf"], help="Author materials through the Usd API or write Sdf specs directly (faster for large directories)")
+    parser.add_argument("-j", "--jobs", type=int, help="Number of workers used to hash textures with -g (defaults to the CPU count)")
+    parser.add_argument("--process-pool", action="store_true", help="Hash textures on a process pool instead of a thread pool")
+    parser.add_argument("-w", "--watch", action="store_true", help="Keep running and update the output files whenever textures are added, removed or modified")
+    parser.add_argument("--poll-interval", type=float, default=1.0, help="Seconds between directory scans in --watch mode")
+    parser.add_argument("--debounce", type=float, default=0.5, help="Seconds the directory has to stay unchanged before --watch applies an update")
+    parser.add_argument("--no-cache", action="store_true", help="Don't read or update the texture hash cache stored next to the output file")
+    parser.add_argument("--rebuild-cache", action="store_true", help="Discard the texture hash cache and hash every texture again")
+    instrumentation.add_arguments(parser)
+
+
+def run(args, parser):
+    # Check target processing directory before use
+    if not os.path.isdir(args.directory):
+        raise FileNotFoundError("Specified processing directory (-d) is invalid")
+    if args.jobs is not None and args.jobs < 1:
+        parser.error("--jobs must be at least 1")
+
+    instrumentation.setup(args, "MagicUSDA")
+    from .core import main
+    return main(args)
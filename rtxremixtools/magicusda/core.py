@@ -0,0 +1,694 @@
+import os
+import concurrent.futures
+import time
+from pxr import Usd, UsdGeom, UsdShade, Sdf
+from . import dds
+from .hashcache import HashCache
+from .. import instrumentation
+
+suffixes = ["_normal", "_emissive", "_metallic", "_rough"]
+
+# Value types of every shader input MagicUSDA authors
+shader_input_types = {
+    "diffuse_texture": Sdf.ValueTypeNames.Asset,
+    "emissive_mask_texture": Sdf.ValueTypeNames.Asset,
+    "enable_emission": Sdf.ValueTypeNames.Bool,
+    "emissive_intensity": Sdf.ValueTypeNames.Float,
+    "metallic_texture": Sdf.ValueTypeNames.Asset,
+    "normal_texture": Sdf.ValueTypeNames.Asset,
+    "reflectionroughness_texture": Sdf.ValueTypeNames.Asset,
+}
+
+# Maps every recognised texture file suffix to the slot it fills in a texture set
+texture_kinds = {
+    "_diffuse": "diffuse",
+    "_albedo": "diffuse",
+    "_normal": "normal",
+    "_emissive": "emissive",
+    "_metallic": "metallic",
+    "_rough": "rough",
+}
+
+
+def texture_key(file_path):
+    # Returns the (stem, kind) a .dds file belongs to in the texture index, or None
+    if not file_path.endswith(".dds"):
+        return None
+    name = os.path.splitext(os.path.basename(file_path))[0]
+    for suffix, kind in texture_kinds.items():
+        if name.endswith(suffix):
+            return name[: -len(suffix)], kind
+    if "_" in name:
+        return None
+    return name, "diffuse"
+
+
+def index_texture(texture_index, file_path) -> None:
+    key = texture_key(file_path)
+    if key:
+        stem, kind = key
+        texture_index.setdefault(stem, {})[kind] = file_path
+
+
+def unindex_texture(texture_index, file_path) -> None:
+    # Drop the texture set once its last file is gone
+    key = texture_key(file_path)
+    if key:
+        stem, kind = key
+        texture_set = texture_index.get(stem, {})
+        if texture_set.get(kind) == file_path:
+            del texture_set[kind]
+            if not texture_set:
+                del texture_index[stem]
+
+
+def build_texture_index(file_list) -> dict:
+    # Group the .dds files from the directory walk into texture sets in a single pass.
+    # Maps each stem (the file name without its suffix) to {kind: path}, so the
+    # authoring passes can look up companion maps instead of rescanning file_list.
+    texture_index = {}
+    for file_path in file_list:
+        index_texture(texture_index, file_path)
+    return texture_index
+
+
+def hash_texture(file_path, cached=None) -> tuple:
+    # Returns the (size, mtime_ns, header, hash) record for a texture.
+    # The cached record is returned as-is if the size, mtime and header all still match.
+    with open(file_path, "rb") as file, dds.map_file(file) as data:
+        stat = os.fstat(file.fileno())
+        # Read the file and extract the raw data. Thanks @BlueAmulet!
+        header = dds.parse_header(data)
+        if len(data) < header.data_offset + header.top_mip_size:
+            raise ValueError("Truncated DDS texture data")
+        raw_header = bytes(data[: header.data_offset])
+        if cached and tuple(cached[:3]) == (stat.st_size, stat.st_mtime_ns, raw_header):
+            return tuple(cached)
+
+        # Hash the top mip straight out of the mapping, without copying it.
+        # xxhash is only imported here, runs without -g never need it.
+        import xxhash
+        with data[header.data_offset : header.data_offset + header.top_mip_size] as top_mip:
+            hash_value = xxhash.xxh3_64(top_mip).hexdigest()
+
+    return (stat.st_size, stat.st_mtime_ns, raw_header, hash_value.upper())
+
+
+def hash_texture_worker(file_path, cached=None) -> tuple:
+    # Runs on the hashing pool. Errors are returned instead of raised, so one broken or
+    # unsupported texture doesn't stop the others from being hashed.
+    try:
+        return hash_texture(file_path, cached), None
+    except (OSError, ValueError) as e:
+        return None, f"{type(e).__name__}: {e}"
+
+
+def generate_hashes(file_path) -> str:
+    return hash_texture(file_path)[3]
+
+
+def diffuse_hash_paths(args, texture_index) -> list:
+    # Collect the files generate_hashes would be called on while authoring
+    reference_directory = args.reference_directory if args.reference_directory else args.directory
+    return [
+        os.path.join(reference_directory, texture_set["diffuse"])
+        for texture_set in texture_index.values()
+        if "diffuse" in texture_set
+    ]
+
+
+def hash_textures(file_paths, jobs=None, use_processes=False, cache=None, evict=True) -> [dict, list]:
+    # Hash every texture up front on a worker pool so authoring only has to do lookups.
+    # Returns the hashes and the textures that couldn't be hashed, which are reported here.
+    file_paths = list(dict.fromkeys(file_paths))
+    cached_records = cache.load() if cache else {}
+    cached = [cached_records.get(os.path.abspath(file_path)) for file_path in file_paths]
+
+    with instrumentation.stage("hashing", items=len(file_paths)):
+        if jobs == 1 or len(file_paths) < 2:
+            results = list(map(hash_texture_worker, file_paths, cached))
+        else:
+            executor_type = concurrent.futures.ProcessPoolExecutor if use_processes else concurrent.futures.ThreadPoolExecutor
+            # ThreadPoolExecutor would default to min(32, CPU count + 4), -j documents the CPU count
+            with executor_type(max_workers=jobs or os.cpu_count()) as executor:
+                # chunksize only matters for processes, where it batches the pickling round trips
+                results = list(executor.map(hash_texture_worker, file_paths, cached, chunksize=64))
+
+    records = {}
+    failures = []
+    for file_path, cached_record, (record, error) in zip(file_paths, cached, results):
+        if error:
+            print(f"Warning: skipping {file_path}, it could not be hashed ({error})")
+            failures.append(file_path)
+        else:
+            records[file_path] = (record, cached_record)
+    if instrumentation.enabled():
+        # Textures served from the cache were only stat'ed, not read
+        instrumentation.count("hashing", bytes_read=sum(
+            record[0] for record, cached_record in records.values() if record != cached_record
+        ))
+
+    if cache:
+        changed = {
+            file_path: record
+            for file_path, (record, cached_record) in records.items()
+            if record != cached_record
+        }
+        cache.store(changed)
+        evicted = cache.evict_missing(file_paths) if evict else 0
+        print(f"Hash cache: {len(records) - len(changed)} reused, {len(changed)} hashed, {evicted} evicted")
+
+    return {file_path: record[3] for file_path, (record, _) in records.items()}, failures
+
+
+def write_usda_file(args, texture_index, suffix=None, hashes=None) -> [list, list]:
+    created_files = []
+    modified_files = []
+    game_ready_assets_path = os.path.join(args.directory)
+    suffix_kind = texture_kinds[suffix] if suffix else None
+
+    # Check if there are any texture files with the specified suffix
+    if suffix:
+        if not any(suffix_kind in texture_set for texture_set in texture_index.values()):
+            # return a blank set
+            return [created_files, modified_files]
+
+    usda_file_name = f'{args.output}{suffix if suffix else ""}.usda'
+    usda_file_path = os.path.join(game_ready_assets_path, usda_file_name)
+
+    if os.path.exists(usda_file_path):
+        modified_files.append(usda_file_path)
+    else:
+        created_files.append(usda_file_path)
+
+    with instrumentation.stage("USDA authoring"):
+        materials = collect_materials(args, texture_index, suffix, hashes)
+    instrumentation.count("USDA authoring", items=len(materials))
+
+    if args.incremental and os.path.exists(usda_file_path):
+        # Open the existing layer and only touch the materials that differ
+        with instrumentation.stage("stage open", items=1):
+            stage = Usd.Stage.Open(usda_file_path)
+        instrumentation.count_file("stage open", usda_file_path)
+        with instrumentation.stage("USDA authoring"):
+            changed = update_materials(stage, materials, args.backend)
+        if not changed:
+            print(f"{usda_file_path} is already up to date")
+            return [[], []]
+        # Save the stage
+        with instrumentation.stage("save", items=1):
+            stage.Save()
+        instrumentation.count_file("save", usda_file_path, written=True)
+    else:
+        for material_name, material in materials.items():
+            print(f"Adding texture {material['texture']} with hash: {material_name[4:]}")
+        create_usda_file(usda_file_path, materials, args.backend)
+    
+    return [modified_files, created_files]
+
+
+def prototype_shader_types(materials) -> list:
+    # Shader types that need a prototype class because materials inherit from it
+    return sorted({material["shader_type"] for material in materials.values() if material.get("inherits")})
+
+
+def create_usda_file(usda_file_path, materials, backend="usd") -> None:
+    if backend == "sdf":
+        # Write the specs straight into a layer, no stage needs to be composed at all
+        with instrumentation.stage("USDA authoring"):
+            layer = Sdf.Layer.CreateNew(usda_file_path)
+            with Sdf.ChangeBlock():
+                root_node_spec = Sdf.PrimSpec(layer, "RootNode", Sdf.SpecifierDef)
+                Sdf.PrimSpec(root_node_spec, "Looks", Sdf.SpecifierDef, "Scope")
+                for shader_type in prototype_shader_types(materials):
+                    author_prototype_sdf(layer, shader_type)
+                for material_name, material in materials.items():
+                    author_material_sdf(layer, material_name, material)
+        with instrumentation.stage("save", items=1):
+            layer.Save()
+        instrumentation.count_file("save", usda_file_path, written=True)
+        return
+
+    with instrumentation.stage("USDA authoring"):
+        # Create a new stage
+        stage = Usd.Stage.CreateNew(usda_file_path)
+
+        # Modify the existing RootNode prim
+        root_node_prim = stage.OverridePrim("/RootNode")
+
+        # Add a Looks scope as a child of the RootNode prim
+        looks_scope = UsdGeom.Scope.Define(stage, "/RootNode/Looks")
+
+        for shader_type in prototype_shader_types(materials):
+            author_prototype(stage, shader_type)
+
+        for material_name, material in materials.items():
+            author_material(stage, material_name, material)
+
+    # Save the stage
+    with instrumentation.stage("save", items=1):
+        stage.Save()
+    instrumentation.count_file("save", usda_file_path, written=True)
+
+
+def collect_materials(args, texture_index, suffix=None, hashes=None) -> dict:
+    # Work out every material the output file should contain, keyed by mat_<HASH> prim name
+    targets = {}
+
+    reference_directory = args.reference_directory if args.reference_directory else args.directory
+    
+    for stem, texture_set in texture_index.items():
+        file_name = texture_set.get("diffuse")
+        if not file_name:
+            continue
+        # Check if the generate_hashes argument is specified
+        if args.generate_hashes:
+            hash_path = os.path.join(reference_directory, file_name)
+            # Reuse the hash from the hashing stage if there was one
+            hash_value = hashes.get(hash_path) if hashes is not None else generate_hashes(hash_path)
+            if not hash_value:
+                continue  # The texture couldn't be hashed, hash_textures already warned about it
+        else:
+            name = os.path.splitext(os.path.basename(file_name))[0]
+            # Check if the name contains a hash or ends with _diffuse or _albedo
+            if not (name.isupper() and len(name) == 16) and not (name.endswith("_diffuse") or name.endswith("_albedo")):
+                continue
+            hash_value = stem  # Use the original name without its suffix as the hash value
+        targets[stem] = hash_value
+
+    suffix_kind = texture_kinds[suffix] if suffix else None
+    materials = {}
+    for value, hash_value in targets.items():
+        texture_set = texture_index[value]
+        # Check if there is a corresponding texture file for the specified suffix
+        if suffix and suffix_kind not in texture_set:
+            continue
+        # Get the relative path from the game ready assets path to the texture file
+        rel_file_path = os.path.relpath(texture_set["diffuse"], args.directory)
+        materials[f"mat_{hash_value.upper()}"] = {
+            "texture": rel_file_path,
+            "shader_type": args.shader_type,
+            "inherits": prototype_path(args.shader_type) if args.prototype else None,
+            "inputs": material_inputs(args, texture_set, suffix),
+        }
+
+    return materials
+
+
+def material_inputs(args, texture_set, suffix=None) -> dict:
+    # Build the shader inputs for one texture set, in authoring order
+    inputs = {}
+
+    if not suffix or suffix == "_diffuse" or suffix == "_albedo":
+        # Use the dynamically generated relative path for the diffuse texture
+        inputs["diffuse_texture"] = f".\\{os.path.relpath(texture_set['diffuse'], args.directory)}"
+
+    # Process each type of texture
+    if (not suffix or suffix == "_emissive") and "emissive" in texture_set:
+        inputs["emissive_mask_texture"] = f".\\{os.path.relpath(texture_set['emissive'], args.directory)}"
+        inputs["enable_emission"] = True
+        inputs["emissive_intensity"] = 5
+
+    if (not suffix or suffix == "_metallic") and "metallic" in texture_set:
+        inputs["metallic_texture"] = f".\\{os.path.relpath(texture_set['metallic'], args.directory)}"
+
+    if (not suffix or suffix == "_normal") and "normal" in texture_set:
+        inputs["normal_texture"] = f".\\{os.path.relpath(texture_set['normal'], args.directory)}"
+
+    if (not suffix or suffix == "_rough") and "rough" in texture_set:
+        inputs["reflectionroughness_texture"] = f".\\{os.path.relpath(texture_set['rough'], args.directory)}"
+
+    return inputs
+
+
+def prototype_path(shader_type) -> str:
+    # Class prim shared by every material of a shader type in --prototype mode
+    return f"/_class_{shader_type}"
+
+
+def author_shader_definition(stage, material_path, shader_type) -> None:
+    # Author the parts that are the same for every material of a shader type:
+    # the MDL source attributes and the shader output connections
+    material_prim = UsdShade.Material(stage.GetPrimAtPath(material_path))
+
+    # Set the shader attributes
+    shader_prim = UsdShade.Shader.Define(stage, f"{material_path}/Shader")
+    shader_prim.GetPrim().CreateAttribute("info:mdl:sourceAsset", Sdf.ValueTypeNames.Asset).Set(
+        f"{shader_type}.mdl"
+    )
+    shader_prim.GetPrim().CreateAttribute("info:implementationSource", Sdf.ValueTypeNames.Token).Set(
+        "sourceAsset"
+    )
+    shader_prim.GetPrim().CreateAttribute("info:mdl:sourceAsset:subIdentifier", Sdf.ValueTypeNames.Token).Set(
+        f"{shader_type}"
+    )
+
+    shader_output = shader_prim.CreateOutput("output", Sdf.ValueTypeNames.Token)
+
+    # Connect shader output to material inputs
+    material_prim.CreateInput(
+        "mdl:displacement", Sdf.ValueTypeNames.Token
+    ).ConnectToSource(shader_output)
+    material_prim.CreateInput(
+        "mdl:surface", Sdf.ValueTypeNames.Token
+    ).ConnectToSource(shader_output)
+    material_prim.CreateInput(
+        "mdl:volume", Sdf.ValueTypeNames.Token
+    ).ConnectToSource(shader_output)
+
+
+def author_prototype(stage, shader_type) -> None:
+    class_prim = stage.CreateClassPrim(prototype_path(shader_type))
+    class_prim.SetTypeName("Material")
+    author_shader_definition(stage, prototype_path(shader_type), shader_type)
+
+
+def author_material(stage, material_name, material) -> None:
+    material_path = f"/RootNode/Looks/{material_name}"
+
+    # Add a material prim as a child of the Looks scope
+    material_prim = UsdShade.Material.Define(stage, material_path)
+    material_prim.GetPrim().GetReferences().SetReferences([])
+
+    if material.get("inherits"):
+        # Everything except the texture inputs comes from the prototype class
+        material_prim.GetPrim().GetInherits().AddInherit(material["inherits"])
+        shader_prim = UsdShade.Shader(stage.OverridePrim(f"{material_path}/Shader"))
+    else:
+        author_shader_definition(stage, material_path, material["shader_type"])
+        shader_prim = UsdShade.Shader(stage.GetPrimAtPath(f"{material_path}/Shader"))
+
+    for input_name, value in material["inputs"].items():
+        shader_prim.CreateInput(input_name, shader_input_types[input_name]).Set(value)
+
+
+def author_shader_definition_sdf(material_spec, shader_type):
+    # Sdf counterpart of author_shader_definition, returns the new shader spec
+    shader_spec = Sdf.PrimSpec(material_spec, "Shader", Sdf.SpecifierDef, "Shader")
+    Sdf.AttributeSpec(shader_spec, "info:mdl:sourceAsset", Sdf.ValueTypeNames.Asset, declaresCustom=True).default = (
+        Sdf.AssetPath(f"{shader_type}.mdl")
+    )
+    Sdf.AttributeSpec(
+        shader_spec, "info:implementationSource", Sdf.ValueTypeNames.Token, Sdf.VariabilityUniform
+    ).default = "sourceAsset"
+    Sdf.AttributeSpec(
+        shader_spec, "info:mdl:sourceAsset:subIdentifier", Sdf.ValueTypeNames.Token, declaresCustom=True
+    ).default = shader_type
+
+    shader_output = Sdf.AttributeSpec(shader_spec, "outputs:output", Sdf.ValueTypeNames.Token)
+
+    # Connect shader output to material inputs
+    for output_name in ("mdl:displacement", "mdl:surface", "mdl:volume"):
+        material_input = Sdf.AttributeSpec(material_spec, f"inputs:{output_name}", Sdf.ValueTypeNames.Token)
+        material_input.connectionPathList.explicitItems = [shader_output.path]
+    return shader_spec
+
+
+def author_prototype_sdf(layer, shader_type) -> None:
+    class_spec = Sdf.PrimSpec(layer, prototype_path(shader_type)[1:], Sdf.SpecifierClass, "Material")
+    author_shader_definition_sdf(class_spec, shader_type)
+
+
+def author_material_sdf(layer, material_name, material) -> None:
+    # Same result as author_material, but written as specs directly into the layer.
+    # Callers batch these under an Sdf.ChangeBlock so change processing only runs once.
+    material_spec = Sdf.CreatePrimInLayer(layer, f"/RootNode/Looks/{material_name}")
+    material_spec.specifier = Sdf.SpecifierDef
+    material_spec.typeName = "Material"
+    material_spec.referenceList.ClearEditsAndMakeExplicit()
+
+    if material.get("inherits"):
+        # Everything except the texture inputs comes from the prototype class
+        material_spec.inheritPathList.prependedItems = [material["inherits"]]
+        shader_spec = Sdf.PrimSpec(material_spec, "Shader", Sdf.SpecifierOver)
+    else:
+        shader_spec = author_shader_definition_sdf(material_spec, material["shader_type"])
+
+    for input_name, value in material["inputs"].items():
+        Sdf.AttributeSpec(shader_spec, f"inputs:{input_name}", shader_input_types[input_name]).default = value
+
+
+def read_authored_materials(stage) -> dict:
+    # Read back the mat_<HASH> prims of an existing layer in the same shape material_inputs builds
+    materials = {}
+    looks_prim = stage.GetPrimAtPath("/RootNode/Looks")
+    if not looks_prim:
+        return materials
+
+    for material_prim in looks_prim.GetChildren():
+        if not material_prim.GetName().startswith("mat_"):
+            continue
+        shader_prim = material_prim.GetChild("Shader")
+        shader_type_attr = shader_prim.GetAttribute("info:mdl:sourceAsset:subIdentifier")
+        inputs = {}
+        for shader_input in UsdShade.Shader(shader_prim).GetInputs():
+            value = shader_input.Get()
+            inputs[shader_input.GetBaseName()] = value.path if isinstance(value, Sdf.AssetPath) else value
+        inherits = material_prim.GetMetadata("inheritPaths")
+        inherits = inherits.GetAddedOrExplicitItems() if inherits else []
+        materials[material_prim.GetName()] = {
+            "shader_type": shader_type_attr.Get() if shader_type_attr else None,
+            "inherits": str(inherits[0]) if inherits else None,
+            "inputs": inputs,
+        }
+    return materials
+
+
+def update_materials(stage, materials, backend="usd", authored=None) -> bool:
+    # Diff the desired materials against the authored ones and apply only the differences.
+    # Pass authored to skip reading the current materials back from the stage.
+    # Returns False if the stage already matched and nothing was changed.
+    if authored is None:
+        authored = read_authored_materials(stage)
+    added = [name for name in materials if name not in authored]
+    removed = [name for name in authored if name not in materials]
+    updated = [
+        name
+        for name in materials
+        if name in authored
+        and (
+            authored[name]["shader_type"] != materials[name]["shader_type"]
+            or authored[name].get("inherits") != materials[name].get("inherits")
+            or authored[name]["inputs"] != materials[name]["inputs"]
+        )
+    ]
+    # Prototype classes no material inherits from anymore, a fresh run wouldn't write them
+    prototype_paths = {prototype_path(shader_type) for shader_type in prototype_shader_types(materials)}
+    stale_prototypes = [
+        prim.GetPath()
+        for prim in stage.GetPseudoRoot().GetAllChildren()
+        if prim.GetName().startswith("_class_") and str(prim.GetPath()) not in prototype_paths
+    ]
+    if not (added or removed or updated or stale_prototypes):
+        return False
+
+    stage.OverridePrim("/RootNode")
+    UsdGeom.Scope.Define(stage, "/RootNode/Looks")
+    for prim_path in stale_prototypes:
+        stage.RemovePrim(prim_path)
+    for shader_type in prototype_shader_types(materials):
+        if not stage.GetPrimAtPath(prototype_path(shader_type)):
+            author_prototype(stage, shader_type)
+    for material_name in removed + updated:
+        stage.RemovePrim(f"/RootNode/Looks/{material_name}")
+    if backend == "sdf":
+        layer = stage.GetEditTarget().GetLayer()
+        with Sdf.ChangeBlock():
+            for material_name in updated + added:
+                author_material_sdf(layer, material_name, materials[material_name])
+    else:
+        for material_name in updated + added:
+            author_material(stage, material_name, materials[material_name])
+
+    print(f"Materials: {len(added)} added, {len(updated)} updated, {len(removed)} removed")
+    return True
+
+
+def scan_textures(directory) -> dict:
+    # Stat every .dds file under directory so --watch can tell what changed between polls
+    textures = {}
+    for root, dirs, files in os.walk(directory):
+        for file in files:
+            if file.endswith(".dds"):
+                file_path = os.path.join(root, file)
+                try:
+                    stat = os.stat(file_path)
+                except FileNotFoundError:
+                    continue  # Removed while scanning, the next poll picks that up
+                textures[file_path] = (stat.st_size, stat.st_mtime_ns)
+    return textures
+
+
+def watch_directory(args, cache=None) -> None:
+    # Keep the texture index, hashes and stages in memory and only apply material edits
+    # for the textures that changed since the last poll
+    reference_directory = args.reference_directory if args.reference_directory else args.directory
+    output_suffixes = suffixes if args.multiple_files else [None]
+    snapshot = {}
+    texture_index = {}
+    hashes = {}
+    stages = {}
+    authored = {}
+
+    print(f"Watching {args.directory} for texture changes, press Ctrl+C to stop")
+    while True:
+        current = scan_textures(args.directory)
+        if current == snapshot:
+            time.sleep(args.poll_interval)
+            continue
+
+        # Wait for bursts of copies to settle before touching the stage
+        while True:
+            time.sleep(args.debounce)
+            latest = scan_textures(args.directory)
+            if latest == current:
+                break
+            current = latest
+
+        start = time.perf_counter()
+        removed = [file_path for file_path in snapshot if file_path not in current]
+        changed = [file_path for file_path, stat in current.items() if snapshot.get(file_path) != stat]
+
+        hash_paths = [
+            os.path.join(reference_directory, file_path)
+            for file_path in changed
+            if texture_key(file_path) and texture_key(file_path)[1] == "diffuse"
+        ]
+        if args.generate_hashes and hash_paths:
+            new_hashes, _ = hash_textures(hash_paths, args.jobs, args.process_pool, cache, evict=False)
+            # A texture that can no longer be hashed drops its material until it is fixed
+            for file_path in hash_paths:
+                hashes.pop(file_path, None)
+            hashes.update(new_hashes)
+
+        for file_path in removed:
+            unindex_texture(texture_index, file_path)
+            hashes.pop(os.path.join(reference_directory, file_path), None)
+        for file_path in changed:
+            index_texture(texture_index, file_path)
+        snapshot = current
+
+        for suffix in output_suffixes:
+            materials = collect_materials(args, texture_index, suffix, hashes)
+            usda_file_path = os.path.join(args.directory, f'{args.output}{suffix if suffix else ""}.usda')
+            if suffix not in stages:
+                if os.path.exists(usda_file_path):
+                    stages[suffix] = Usd.Stage.Open(usda_file_path)
+                elif materials:
+                    stages[suffix] = Usd.Stage.CreateNew(usda_file_path)
+                else:
+                    continue
+                authored[suffix] = read_authored_materials(stages[suffix])
+
+            if update_materials(stages[suffix], materials, args.backend, authored[suffix]):
+                stages[suffix].Save()
+                print(f"Updated {usda_file_path} in {time.perf_counter() - start:.2f}s")
+            authored[suffix] = materials
+
+
+def add_sublayers(args, file_list) -> list:
+    modified_files = []
+    game_ready_assets_path = os.path.join(args.directory)
+    mod_file_path = os.path.join(game_ready_assets_path, "mod.usda")
+    if os.path.exists(mod_file_path):
+        modified_files.append(mod_file_path)
+
+        # Open the existing stage
+        stage = Usd.Stage.Open(mod_file_path)
+
+        # Get the existing sublayers
+        existing_sublayers = list(stage.GetRootLayer().subLayerPaths)
+
+        # Create a set of existing sublayer file names
+        existing_sublayer_files = {
+            os.path.basename(sublayer_path) for sublayer_path in existing_sublayers
+        }
+
+        # Add new sublayers
+        new_sublayers = [
+            f"./{args.output}{suffix}.usda"
+            for suffix in suffixes
+            if f"{args.output}{suffix}.usda" not in existing_sublayer_files
+            and any(
+                os.path.basename(file_path) == f"{args.output}{suffix}.usda"
+                for file_path in file_list
+            )
+        ]
+        stage.GetRootLayer().subLayerPaths = (existing_sublayers + new_sublayers)
+
+        # Save the stage
+        stage.Save()
+
+    return modified_files
+
+
+def main(args) -> int:
+    # Runs MagicUSDA for the arguments parsed by rtxremixtools.magicusda.cli
+    if args.watch:
+        try:
+            if args.generate_hashes and not args.no_cache:
+                cache_path = os.path.join(args.directory, f"{args.output}.hashcache")
+                with HashCache(cache_path, rebuild=args.rebuild_cache) as cache:
+                    watch_directory(args, cache)
+            else:
+                watch_directory(args)
+        except KeyboardInterrupt:
+            print("Stopped watching")
+        return 0
+
+    # Recursively scan folders
+    file_list = []
+    with instrumentation.stage("directory walk"):
+        for root, dirs, files in os.walk(args.directory):
+            for file in files:
+                file_list.append(os.path.join(root, file))
+    instrumentation.count("directory walk", items=len(file_list))
+    created_files  = []
+    modified_files = []
+
+    # Group the textures into sets once, every authoring pass works from this index
+    texture_index = build_texture_index(file_list)
+
+    # Hash all diffuse textures once, before any of the authoring passes need them
+    hashes = None
+    hash_failures = []
+    if args.generate_hashes:
+        hash_paths = diffuse_hash_paths(args, texture_index)
+        if args.no_cache:
+            hashes, hash_failures = hash_textures(hash_paths, args.jobs, args.process_pool)
+        else:
+            cache_path = os.path.join(args.directory, f"{args.output}.hashcache")
+            with HashCache(cache_path, rebuild=args.rebuild_cache) as cache:
+                hashes, hash_failures = hash_textures(hash_paths, args.jobs, args.process_pool, cache)
+        print(f"Hashed {len(hashes)} textures")
+        if hash_failures and not hashes:
+            # Writing now would replace the existing layers with empty ones
+            print(f"Error: none of the {len(hash_failures)} textures could be hashed, no files were written")
+            return 1
+    
+    # Process sublayer additions
+    print(f"Add Sublayers: {args.add_sublayers}")
+    if args.add_sublayers:
+        modified_files.extend(add_sublayers(args, file_list))
+    
+    # Generate unique USDA files per suffix type (except diffuse)
+    if args.multiple_files:
+        for suffix in suffixes:
+            m, c = write_usda_file(args, texture_index, suffix, hashes)
+            modified_files.extend(m), created_files.extend(c)
+    else:  # Generate a single USDA file for all suffixes
+        m, c = write_usda_file(args, texture_index, hashes=hashes)
+        modified_files.extend(m), created_files.extend(c)
+    
+    # Complete
+    print("Finished!")
+    print("Created files:")
+    for file in created_files:
+        print(f"  - {file}")
+    print("Modified files:")
+    for file in modified_files:
+        print(f"  - {file}")
+    if hash_failures:
+        print(f"Error: {len(hash_failures)} textures could not be hashed, their materials are missing")
+        return 1
+    return 0
@@ -0,0 +1,156 @@
+import contextlib
+import mmap
+import os
+from collections import namedtuple
+
+DDS_MAGIC = b"DDS "
+DDS_HEADER_SIZE = 128  # Magic + DDS_HEADER
+DX10_HEADER_SIZE = 20  # DDS_HEADER_DXT10 following the main header
+
+DDSD_DEPTH = 0x800000
+DDPF_FOURCC = 0x4
+DDPF_UNCOMPRESSED = 0x20242 | 0x80000  # DDPF_ALPHA | DDPF_RGB | DDPF_YUV | DDPF_LUMINANCE | DDPF_BUMPDUDV
+D3D10_RESOURCE_DIMENSION_TEXTURE3D = 4
+
+# Each format is described as (block width, block height, bytes per block).
+# Uncompressed formats use 1x1 blocks, packed 4:2:2 formats use 2x1 blocks.
+BC_8 = (4, 4, 8)
+BC_16 = (4, 4, 16)
+
+DXGI_FORMATS = {
+    # R32G32B32A32
+    **dict.fromkeys(range(1, 5), (1, 1, 16)),
+    # R32G32B32
+    **dict.fromkeys(range(5, 9), (1, 1, 12)),
+    # R16G16B16A16, R32G32, R32G8X24 and D32_FLOAT_S8X24
+    **dict.fromkeys(range(9, 23), (1, 1, 8)),
+    # R10G10B10A2, R11G11B10, R8G8B8A8, R16G16, R32 and R24G8 / D24S8
+    **dict.fromkeys(range(23, 48), (1, 1, 4)),
+    # R8G8 and R16 / D16
+    **dict.fromkeys(range(48, 60), (1, 1, 2)),
+    # R8 and A8
+    **dict.fromkeys(range(60, 66), (1, 1, 1)),
+    66: (8, 1, 1),  # R1_UNORM
+    67: (1, 1, 4),  # R9G9B9E5_SHAREDEXP
+    68: (2, 1, 4),  # R8G8_B8G8_UNORM
+    69: (2, 1, 4),  # G8R8_G8B8_UNORM
+    **dict.fromkeys(range(70, 73), BC_8),  # BC1
+    **dict.fromkeys(range(73, 76), BC_16),  # BC2
+    **dict.fromkeys(range(76, 79), BC_16),  # BC3
+    **dict.fromkeys(range(79, 82), BC_8),  # BC4
+    **dict.fromkeys(range(82, 85), BC_16),  # BC5
+    85: (1, 1, 2),  # B5G6R5_UNORM
+    86: (1, 1, 2),  # B5G5R5A1_UNORM
+    # B8G8R8A8, B8G8R8X8 and R10G10B10_XR_BIAS_A2
+    **dict.fromkeys(range(87, 94), (1, 1, 4)),
+    **dict.fromkeys(range(94, 97), BC_16),  # BC6H
+    **dict.fromkeys(range(97, 100), BC_16),  # BC7
+    100: (1, 1, 4),  # AYUV
+    101: (1, 1, 4),  # Y410
+    102: (1, 1, 8),  # Y416
+    107: (2, 1, 4),  # YUY2
+    108: (2, 1, 8),  # Y210
+    109: (2, 1, 8),  # Y216
+    114: (1, 1, 1),  # P8
+    115: (1, 1, 2),  # B4G4R4A4_UNORM
+}
+
+FOURCC_FORMATS = {
+    b"DXT1": BC_8,
+    b"DXT2": BC_16,
+    b"DXT3": BC_16,
+    b"DXT4": BC_16,
+    b"DXT5": BC_16,
+    b"ATI1": BC_8,
+    b"BC4U": BC_8,
+    b"BC4S": BC_8,
+    b"ATI2": BC_16,
+    b"BC5U": BC_16,
+    b"BC5S": BC_16,
+    b"RGBG": (2, 1, 4),
+    b"GRGB": (2, 1, 4),
+    b"UYVY": (2, 1, 4),
+    b"YUY2": (2, 1, 4),
+    # Legacy D3DFORMAT values stored as numeric FourCCs
+    (36).to_bytes(4, "little"): (1, 1, 8),  # A16B16G16R16
+    (110).to_bytes(4, "little"): (1, 1, 8),  # Q16W16V16U16
+    (111).to_bytes(4, "little"): (1, 1, 2),  # R16F
+    (112).to_bytes(4, "little"): (1, 1, 4),  # G16R16F
+    (113).to_bytes(4, "little"): (1, 1, 8),  # A16B16G16R16F
+    (114).to_bytes(4, "little"): (1, 1, 4),  # R32F
+    (115).to_bytes(4, "little"): (1, 1, 8),  # G32R32F
+    (116).to_bytes(4, "little"): (1, 1, 16),  # A32B32G32R32F
+    (117).to_bytes(4, "little"): (1, 1, 2),  # CxV8U8
+}
+
+DDSHeader = namedtuple("DDSHeader", "width height depth mip_count format data_offset top_mip_size")
+
+
+def top_mip_size(width, height, depth, block_format) -> int:
+    block_width, block_height, block_bytes = block_format
+    blocks_wide = max(1, (width + block_width - 1) // block_width)
+    blocks_high = max(1, (height + block_height - 1) // block_height)
+    return blocks_wide * blocks_high * block_bytes * depth
+
+
+def parse_header(data) -> DDSHeader:
+    # Parse the DDS header (and the DX10 extension header if present) from the start of data
+    if len(data) < DDS_HEADER_SIZE or bytes(data[:4]) != DDS_MAGIC:
+        raise ValueError("Not a DDS file")
+
+    flags = int.from_bytes(data[8:12], "little")
+    height = int.from_bytes(data[12:16], "little")
+    width = int.from_bytes(data[16:20], "little")
+    depth = int.from_bytes(data[24:28], "little") if flags & DDSD_DEPTH else 1
+    mip_count = max(1, int.from_bytes(data[28:32], "little"))
+    pf_flags = int.from_bytes(data[80:84], "little")
+    fourcc = bytes(data[84:88])
+    bit_count = int.from_bytes(data[88:92], "little")
+
+    data_offset = DDS_HEADER_SIZE
+    if pf_flags & DDPF_FOURCC and fourcc == b"DX10":
+        if len(data) < DDS_HEADER_SIZE + DX10_HEADER_SIZE:
+            raise ValueError("Truncated DX10 DDS header")
+        dxgi_format = int.from_bytes(data[128:132], "little")
+        resource_dimension = int.from_bytes(data[132:136], "little")
+        if resource_dimension != D3D10_RESOURCE_DIMENSION_TEXTURE3D:
+            depth = 1
+        data_offset += DX10_HEADER_SIZE
+        if dxgi_format not in DXGI_FORMATS:
+            raise ValueError(f"Unsupported DXGI format {dxgi_format}")
+        texture_format = f"DXGI_{dxgi_format}"
+        block_format = DXGI_FORMATS[dxgi_format]
+    elif pf_flags & DDPF_FOURCC:
+        if fourcc not in FOURCC_FORMATS:
+            raise ValueError(f"Unsupported DDS FourCC {fourcc!r}")
+        texture_format = fourcc.decode("latin-1") if fourcc.isalnum() else str(int.from_bytes(fourcc, "little"))
+        block_format = FOURCC_FORMATS[fourcc]
+    elif pf_flags & DDPF_UNCOMPRESSED and bit_count:
+        # Uncompressed pixel formats are fully described by their bit count
+        texture_format = f"{bit_count}bpp"
+        block_format = (8 // bit_count, 1, 1) if bit_count < 8 else (1, 1, bit_count // 8)
+    else:
+        raise ValueError("Unsupported DDS pixel format")
+
+    return DDSHeader(
+        width, height, depth, mip_count, texture_format, data_offset,
+        top_mip_size(width, height, depth, block_format),
+    )
+
+
+@contextlib.contextmanager
+def map_file(file):
+    # Yield a zero-copy memoryview of an open file. Slices of it can be handed straight
+    # to xxhash and friends without the data ever being copied into a bytes object.
+    size = os.fstat(file.fileno()).st_size
+    if size == 0:
+        # mmap refuses to map empty files
+        yield memoryview(b"")
+        return
+    with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        view = memoryview(mapped)
+        try:
+            yield view
+        finally:
+            view.release()
+
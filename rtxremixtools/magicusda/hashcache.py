@@ -0,0 +1,63 @@
+import os
+import sqlite3
+
+# Bump this whenever the stored record layout or the hashing itself changes
+CACHE_VERSION = 2
+
+
+class HashCache:
+    # Persistent texture hash cache stored as a small SQLite database.
+    # Each record is (size, mtime_ns, header, hash), keyed by the absolute texture path.
+    # A record is only reused when the size, mtime and raw DDS header (including the DX10
+    # extension) all still match.
+
+    def __init__(self, cache_path, rebuild=False):
+        self.cache_path = cache_path
+        self.connection = sqlite3.connect(cache_path)
+        version = self.connection.execute("PRAGMA user_version").fetchone()[0]
+        if rebuild or version != CACHE_VERSION:
+            self.connection.execute("DROP TABLE IF EXISTS hashes")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS hashes ("
+            "path TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER, header BLOB, hash TEXT)"
+        )
+        self.connection.execute(f"PRAGMA user_version = {CACHE_VERSION}")
+        self.connection.commit()
+
+    def load(self) -> dict:
+        # Read the whole cache at once, one query is much cheaper than a lookup per texture
+        return {
+            path: (size, mtime_ns, bytes(header), hash_value)
+            for path, size, mtime_ns, header, hash_value in self.connection.execute(
+                "SELECT path, size, mtime_ns, header, hash FROM hashes"
+            )
+        }
+
+    def store(self, records) -> None:
+        self.connection.executemany(
+            "INSERT OR REPLACE INTO hashes (path, size, mtime_ns, header, hash) VALUES (?, ?, ?, ?, ?)",
+            [(os.path.abspath(path),) + tuple(record) for path, record in records.items()],
+        )
+        self.connection.commit()
+
+    def evict_missing(self, known_paths=()) -> int:
+        # Drop entries for textures that no longer exist on disk.
+        # Paths hashed during this run are known to exist, so skip the stat for those.
+        known_paths = {os.path.abspath(path) for path in known_paths}
+        stale_paths = [
+            (path,)
+            for (path,) in self.connection.execute("SELECT path FROM hashes")
+            if path not in known_paths and not os.path.isfile(path)
+        ]
+        self.connection.executemany("DELETE FROM hashes WHERE path = ?", stale_paths)
+        self.connection.commit()
+        return len(stale_paths)
+
+    def close(self) -> None:
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,7 @@
+# Shared by the command line and the converter, kept here so parsing arguments doesn't import USD
+
+# Payload prims loaded at once in streaming mode
+DEFAULT_STREAM_BATCH_SIZE = 16
+
+# In batch mode without -f, .usda inputs larger than this are written as binary crate .usd files
+DEFAULT_CRATE_THRESHOLD_MB = 8
@@ -0,0 +1,30 @@
+from .. import instrumentation
+from . import DEFAULT_CRATE_THRESHOLD_MB, DEFAULT_STREAM_BATCH_SIZE
+
+# Argument parsing for the meshconvert subcommand. Kept apart from core so --help and
+# argument errors don't pay for importing the USD libraries and NumPy.
+
+
+def add_arguments(parser):
+    parser.add_argument('input', type=str, help='Input file or folder path')
+    parser.add_argument('output', type=str, help='Output file or folder path')
+    parser.add_argument('-f', '--format', type=str, choices=['usd', 'usda'], help='Output file format (usd or usda)')
+    parser.add_argument('-w', '--weld', action='store_true', help='Merge duplicate vertices after the conversion to produce compact indexed meshes')
+    parser.add_argument('-e', '--weld-epsilon', type=float, help='Treat vertex attributes within this distance as identical when welding')
+    parser.add_argument('--stream', action='store_true', help='Load payloads in small batches instead of the whole scene at once')
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_STREAM_BATCH_SIZE, help='Number of payloads loaded at once with --stream')
+    parser.add_argument('--memory-budget', type=float, help='Memory budget in MB for --stream, batches shrink while it is exceeded')
+    parser.add_argument('-j', '--jobs', type=int, help='Number of worker processes used in batch mode (defaults to the CPU count)')
+    parser.add_argument('--crate-threshold', type=float, default=DEFAULT_CRATE_THRESHOLD_MB,
+                        help='In batch mode without -f, write .usda inputs of at least this many MB as binary .usd files (negative to disable)')
+    parser.add_argument('--force', action='store_true', help='Convert every file in batch mode, even if its output is newer than the input')
+    instrumentation.add_arguments(parser)
+
+
+def run(args, parser):
+    if args.jobs is not None and args.jobs < 1:
+        parser.error('--jobs must be at least 1')
+
+    instrumentation.setup(args, 'RemixMeshConvert')
+    from .core import main
+    return main(args)
@@ -0,0 +1,440 @@
+import concurrent.futures
+import logging
+import os
+import time
+
+import numpy as np
+from pxr import Usd, UsdGeom, Gf, Sdf, Vt
+
+from .. import instrumentation
+from . import DEFAULT_CRATE_THRESHOLD_MB, DEFAULT_STREAM_BATCH_SIZE
+
+ALIASES = {
+    "primvars:UVMap": ("primvars:st", Sdf.ValueTypeNames.Float2Array),
+    "primvars:UVChannel_1": ("primvars:st1", Sdf.ValueTypeNames.Float2Array),
+    "primvars:map1": ("primvars:st1", Sdf.ValueTypeNames.Float2Array),
+    # Add more aliases here
+}
+
+USD_EXTENSIONS = ('.usd', '.usda', '.usdc')
+
+
+def to_vt_array(array_type, data):
+    # Vt.TokenArray, StringArray and Sdf.AssetPathArray have no FromNumpy, build those from a list
+    if hasattr(array_type, 'FromNumpy'):
+        return array_type.FromNumpy(data)
+    return array_type(data.tolist())
+
+
+def face_vertex_gather(interpolation, face_vertex_indices, face_vertex_counts):
+    # Index array that gathers per-face-vertex values for data of the given interpolation.
+    # Returns None for faceVarying data, which is already stored per face-vertex.
+    if interpolation in (UsdGeom.Tokens.vertex, UsdGeom.Tokens.varying):
+        return face_vertex_indices
+    if interpolation == UsdGeom.Tokens.uniform:
+        return np.repeat(np.arange(len(face_vertex_counts)), face_vertex_counts)
+    return None
+
+
+def group_elements(values, element_size=1):
+    # View a flat primvar array as one row per element, primvars like skel:jointIndices
+    # store elementSize values for every point
+    data = np.asarray(values)
+    if element_size <= 1:
+        return data
+    if len(data) % element_size:
+        raise ValueError(f"{len(data)} values don't divide into elements of size {element_size}")
+    return data.reshape((-1, element_size) + data.shape[1:])
+
+
+def expand_to_face_vertices(values, interpolation, face_vertex_indices, face_vertex_counts, value_indices=None, element_size=1):
+    # Expand values to one element per face-vertex with a single NumPy gather.
+    # Indexed primvars are de-indexed as part of the same gather.
+    gather = face_vertex_gather(interpolation, face_vertex_indices, face_vertex_counts)
+    if value_indices is not None:
+        gather = value_indices if gather is None else value_indices[gather]
+    data = group_elements(values, element_size)
+    if gather is None:
+        return np.asarray(values)
+    if len(gather) and gather.max() >= len(data):
+        raise ValueError(f"{len(data)} values can't be expanded for {interpolation} interpolation")
+    expanded = data[gather]
+    return expanded.reshape((-1,) + expanded.shape[2:]) if element_size > 1 else expanded
+
+
+def weld_vertices(prim, epsilon=None):
+    # Merge vertices whose position, normal and vertex primvars (st, st1, ...) are all identical,
+    # or identical after snapping to a grid of size epsilon, and rebuild faceVertexIndices.
+    # Uses a sort-based unique over packed rows, so the whole pass is vectorized.
+    mesh = UsdGeom.Mesh(prim)
+    points = mesh.GetPointsAttr()
+    points_arr = points.Get()
+    count = len(points_arr) if points_arr is not None else 0
+    if not count:
+        return  # Nothing to weld, and the reshapes below can't infer a width from no rows
+
+    # Every attribute that holds one element per point has to be compacted together with the points
+    attributes = [(points, points_arr, 1)]
+    normals = mesh.GetNormalsAttr()
+    if normals and normals.HasValue() and mesh.GetNormalsInterpolation() == UsdGeom.Tokens.vertex:
+        attributes.append((normals, normals.Get(), 1))
+    for var in UsdGeom.PrimvarsAPI(prim).GetPrimvars():
+        if var.GetInterpolation() in (UsdGeom.Tokens.vertex, UsdGeom.Tokens.varying) and not var.IsIndexed():
+            values = var.Get()
+            element_size = max(1, var.GetElementSize())
+            if values is not None and len(values) == count * element_size:
+                attributes.append((var.GetAttr(), values, element_size))
+
+    columns = []
+    codes = []
+    for _, values, _ in attributes:
+        data = np.asarray(values)
+        if data.dtype.kind in 'biuf':
+            columns.append(data.astype(np.float64).reshape(count, -1))
+        else:
+            # Tokens, strings and asset paths are compared through integer codes, which
+            # must not be snapped to the epsilon grid
+            _, inverse = np.unique(data.astype(str).ravel(), return_inverse=True)
+            codes.append(inverse.astype(np.float64).reshape(count, -1))
+    keys = np.hstack(columns)
+    if epsilon:
+        keys = np.round(keys / epsilon)
+    keys = np.hstack([keys] + codes)
+    # Adding 0.0 turns -0.0 into 0.0 so both compare equal byte-wise. This has to happen
+    # after rounding, small negative values round to -0.0.
+    keys = np.ascontiguousarray(keys + 0.0)
+    packed = keys.view(np.dtype((np.void, keys.dtype.itemsize * keys.shape[1]))).ravel()
+    _, first, inverse = np.unique(packed, return_index=True, return_inverse=True)
+
+    # np.unique sorts by key, renumber so the welded vertices keep their original order
+    order = np.argsort(first)
+    renumber = np.empty_like(order)
+    renumber[order] = np.arange(len(order))
+    first = first[order]
+    inverse = renumber[inverse.ravel()]
+
+    for attribute, values, element_size in attributes:
+        welded = group_elements(values, element_size)[first]
+        attribute.Set(to_vt_array(type(values), welded.reshape((-1,) + welded.shape[2:]) if element_size > 1 else welded))
+    mesh.GetFaceVertexIndicesAttr().Set(Vt.IntArray.FromNumpy(inverse.astype(np.int32)))
+    logging.debug(f"Welded {prim.GetPath()}: {count} -> {len(first)} vertices")
+
+
+def convert_mesh(prim, weld=False, weld_epsilon=None):
+    # Convert a single mesh to vertex interpolation, optionally welding duplicate vertices afterwards
+    mesh = UsdGeom.Mesh(prim)
+    indices = prim.GetAttribute("faceVertexIndices")
+    points = prim.GetAttribute("points")
+    
+    if not indices or not points:
+        return  # Skip if the required attributes are missing
+
+    # Work on NumPy views of the Vt arrays, every expansion below is a single gather
+    face_vertex_indices = np.asarray(indices.Get())
+    face_vertex_counts = np.asarray(mesh.GetFaceVertexCountsAttr().Get())
+    points_arr = np.asarray(points.Get())
+
+    # Every face-vertex becomes its own point
+    points.Set(Vt.Vec3fArray.FromNumpy(points_arr[face_vertex_indices]))
+    indices.Set(Vt.IntArray.FromNumpy(np.arange(len(face_vertex_indices), dtype=np.int32)))
+
+    normals = mesh.GetNormalsAttr()
+    if normals and normals.HasValue():
+        normals_arr = normals.Get()
+        expanded = expand_to_face_vertices(
+            normals_arr, mesh.GetNormalsInterpolation(), face_vertex_indices, face_vertex_counts
+        )
+        normals.Set(to_vt_array(type(normals_arr), expanded))
+    mesh.SetNormalsInterpolation(UsdGeom.Tokens.vertex)
+
+    primvar_api = UsdGeom.PrimvarsAPI(prim)
+    for var in primvar_api.GetPrimvars():
+        values = var.Get()
+        if values is not None and var.GetInterpolation() != UsdGeom.Tokens.constant:
+            value_indices = np.asarray(var.GetIndices()) if var.IsIndexed() else None
+            try:
+                expanded = expand_to_face_vertices(
+                    values, var.GetInterpolation(), face_vertex_indices, face_vertex_counts, value_indices,
+                    var.GetElementSize(),
+                )
+            except ValueError as e:
+                logging.warning(f"Skipping {var.GetAttr().GetPath()}: {e}")
+                continue
+            var.Set(to_vt_array(type(values), expanded))
+            if value_indices is not None:
+                var.BlockIndices()
+            var.SetInterpolation(UsdGeom.Tokens.vertex)
+
+    # Replace aliases with "float2[] primvars:st". This runs once every primvar has been
+    # expanded, otherwise an existing target later in the list would be expanded twice.
+    for var in primvar_api.GetPrimvars():
+        if var.GetName() in ALIASES:
+            new_name, new_type_name = ALIASES[var.GetName()]
+            new_var = primvar_api.GetPrimvar(new_name)
+            if new_var:
+                new_var.Set(var.Get())
+                # The aliased values are already expanded, so drop the target's own layout
+                new_var.SetInterpolation(UsdGeom.Tokens.vertex)
+                if new_var.IsIndexed():
+                    new_var.BlockIndices()
+            else:
+                new_var = primvar_api.CreatePrimvar(new_name, new_type_name)
+                new_var.Set(var.Get())
+                new_var.SetInterpolation(UsdGeom.Tokens.vertex) # Set interpolation to vertex
+            
+            primvar_api.RemovePrimvar(var.GetBaseName())
+
+    if weld:
+        with instrumentation.stage('welding', items=1):
+            weld_vertices(prim, weld_epsilon)
+
+
+def convert_streaming(stage, output_file, weld=False, weld_epsilon=None, batch_size=DEFAULT_STREAM_BATCH_SIZE,
+                      memory_budget=None):
+    # Convert the meshes of a stage opened with Usd.Stage.LoadNone, so only one batch of
+    # payloads is ever loaded. Each batch is authored on its own layer, written next to
+    # output_file once the batch is done and added to the root layer's sublayers, so
+    # nothing converted stays in memory after its payloads have been unloaded again.
+    payload_roots = []
+    meshes = 0
+    prim_range = iter(stage.TraverseAll())
+    for prim in prim_range:
+        if prim.HasAuthoredPayloads() and not prim.IsLoaded():
+            # Nothing below an unloaded payload is composed yet, it's converted in a later batch
+            payload_roots.append(prim.GetPath())
+            prim_range.PruneChildren()
+        elif prim.IsA(UsdGeom.Mesh):
+            with instrumentation.stage('mesh conversion', items=1):
+                convert_mesh(prim, weld, weld_epsilon)
+            meshes += 1
+
+    rss = instrumentation.current_rss()
+    if memory_budget and rss is None:
+        logging.warning("Can't measure memory usage on this platform, ignoring the memory budget")
+        memory_budget = None
+
+    root_layer = stage.GetRootLayer()
+    session_layer = stage.GetSessionLayer()
+    output_base = os.path.splitext(output_file)[0]
+    part_paths = []
+    overridden = []
+    loaded = []
+    while payload_roots:
+        batch, payload_roots = payload_roots[:batch_size], payload_roots[batch_size:]
+        # Session sublayers are stronger than the root layer, so the batch reads back its own edits
+        part = Sdf.Layer.CreateAnonymous('.usdc')
+        session_layer.subLayerPaths.insert(0, part.identifier)
+        stage.SetEditTarget(Usd.EditTarget(part))
+        # Loading the next batch and unloading the previous one is a single recomposition
+        with instrumentation.stage('payload load', items=len(batch)):
+            stage.LoadAndUnload(set(batch), set(loaded))
+        loaded = batch
+        for path in batch:
+            for prim in Usd.PrimRange.AllPrims(stage.GetPrimAtPath(path)):
+                if prim.IsA(UsdGeom.Mesh):
+                    with instrumentation.stage('mesh conversion', items=1):
+                        convert_mesh(prim, weld, weld_epsilon)
+                    meshes += 1
+
+        stage.SetEditTarget(Usd.EditTarget(root_layer))
+        session_layer.subLayerPaths.remove(part.identifier)
+        if part.rootPrims:
+            part_path = f"{output_base}_part{len(part_paths) + 1:03d}.usdc"
+            with instrumentation.stage('save', items=1):
+                if not part.Export(part_path):
+                    raise RuntimeError(f"Failed to export {part_path}")
+            instrumentation.count_file('save', part_path, written=True)
+            part_paths.append('./' + os.path.basename(part_path))
+            overridden.extend(root_overrides(root_layer, part))
+        del part
+
+        # Shrink the batches while the process is over budget, down to one payload at a time
+        rss = instrumentation.current_rss() if memory_budget else None
+        if rss is not None and rss > memory_budget and batch_size > 1:
+            batch_size = max(1, batch_size // 2)
+            logging.debug(f"Memory usage {rss / 2 ** 20:.0f} MB is over budget, loading {batch_size} payloads at a time")
+
+    if loaded:
+        stage.Unload(Sdf.Path.absoluteRootPath)
+
+    # Sublayers are weaker than the root layer itself, so its own opinions on the converted
+    # attributes are cleared
+    with Sdf.ChangeBlock():
+        for spec, key in overridden:
+            spec.ClearInfo(key)
+    logging.debug(f"Streamed {meshes} meshes into {len(part_paths)} part layers")
+    return part_paths
+
+
+def root_overrides(root_layer, part):
+    # (spec, field) pairs of the root layer that would hide the values authored on part
+    overrides = []
+
+    def visit(path):
+        if not path.IsPropertyPath():
+            return
+        root_spec = root_layer.GetPropertyAtPath(path)
+        part_spec = part.GetPropertyAtPath(path)
+        if not root_spec or not part_spec:
+            return
+        for key in part_spec.ListInfoKeys():
+            if key not in ('typeName', 'custom', 'variability') and root_spec.HasInfo(key):
+                overrides.append((root_spec, key))
+        if 'default' in part_spec.ListInfoKeys() and root_spec.HasInfo('timeSamples'):
+            overrides.append((root_spec, 'timeSamples'))
+
+    part.Traverse(Sdf.Path.absoluteRootPath, visit)
+    return overrides
+
+
+def convert_face_varying_to_vertex_interpolation(usd_file_path, weld=False, weld_epsilon=None, stream=False,
+                                                 batch_size=DEFAULT_STREAM_BATCH_SIZE, memory_budget=None,
+                                                 output_file=None):
+    # Returns the converted root layer. The input is never written to, all edits stay in memory
+    # until the layer is exported. Streaming writes the converted payloads next to output_file.
+    if stream and not output_file:
+        raise ValueError("Streaming needs the output file to write the converted payloads next to")
+    with instrumentation.stage('stage open', items=1):
+        # The stage only hands out weak layer handles, this keeps the edits alive after it's gone
+        root_layer = Sdf.Layer.FindOrOpen(usd_file_path)
+        if not root_layer:
+            raise RuntimeError(f"Failed to open {usd_file_path}")
+        stage = Usd.Stage.Open(root_layer, Usd.Stage.LoadNone if stream else Usd.Stage.LoadAll)
+    instrumentation.count_file('stage open', usd_file_path)
+    root_layer.SetPermissionToSave(False)
+
+    if stream:
+        part_paths = convert_streaming(stage, output_file, weld, weld_epsilon, batch_size, memory_budget)
+        # The parts are relative to the output, so they are only added once the stage is gone,
+        # a live stage would try to load them next to the input. Later parts come first, they
+        # never overlap anyway.
+        del stage
+        root_layer.subLayerPaths = part_paths[::-1] + list(root_layer.subLayerPaths)
+        return root_layer
+
+    mesh_prims = [prim for prim in stage.TraverseAll() if prim.IsA(UsdGeom.Mesh)]
+    for prim in mesh_prims:
+        with instrumentation.stage('mesh conversion', items=1):
+            convert_mesh(prim, weld, weld_epsilon)
+
+    return root_layer
+
+
+def export_layer(layer, output_file):
+    # Write the converted root layer once, straight to its destination.
+    # .usd files are always written as binary crate, whatever the default .usd format is.
+    args = {'format': 'usdc'} if output_file.lower().endswith('.usd') else {}
+    with instrumentation.stage('save', items=1):
+        if not layer.Export(output_file, args=args):
+            raise RuntimeError(f"Failed to export {output_file}")
+    instrumentation.count_file('save', output_file, written=True)
+
+
+def convert_file(input_file, output_file, **options):
+    layer = convert_face_varying_to_vertex_interpolation(input_file, output_file=output_file, **options)
+    export_layer(layer, output_file)
+
+
+def convert_file_worker(input_file, output_file, options, metrics=False):
+    # Runs in a worker process, errors are returned so one broken asset doesn't stop the batch.
+    # Stage metrics are handed back too, the parent merges them into its own.
+    instrumentation.enable_worker(metrics)
+    start = time.perf_counter()
+    try:
+        convert_file(input_file, output_file, **options)
+        return input_file, output_file, time.perf_counter() - start, None, instrumentation.snapshot()
+    except Exception as e:
+        # Any output left from an earlier run stays as it is. Export writes through a temporary
+        # file, so a failure here never leaves a half-written output that looks up to date.
+        return input_file, output_file, time.perf_counter() - start, f'{type(e).__name__}: {e}', instrumentation.snapshot()
+
+
+def find_usd_files(input_folder, output_folder, output_extension=None, crate_threshold=DEFAULT_CRATE_THRESHOLD_MB):
+    # Walk the input folder recursively and pair every USD layer with its output path,
+    # mirroring the folder structure below the output folder.
+    # Without an explicit format, large text layers are switched to binary crate.
+    pairs = []
+    for root, dirs, files in os.walk(input_folder):
+        dirs.sort()
+        for file_name in sorted(files):
+            if not file_name.lower().endswith(USD_EXTENSIONS):
+                continue
+            input_file = os.path.join(root, file_name)
+            relative_path = os.path.relpath(input_file, input_folder)
+            if output_extension:
+                relative_path = os.path.splitext(relative_path)[0] + '.' + output_extension
+            elif (crate_threshold is not None and file_name.lower().endswith('.usda')
+                    and os.path.getsize(input_file) >= crate_threshold * 1024 * 1024):
+                relative_path = os.path.splitext(relative_path)[0] + '.usd'
+            pairs.append((input_file, os.path.join(output_folder, relative_path)))
+    return pairs
+
+
+def is_up_to_date(input_file, output_file):
+    return os.path.isfile(output_file) and os.path.getmtime(output_file) >= os.path.getmtime(input_file)
+
+
+def process_folder(input_folder, output_folder, output_extension=None, jobs=None, force=False,
+                   crate_threshold=DEFAULT_CRATE_THRESHOLD_MB, **options):
+    # options are passed on to convert_face_varying_to_vertex_interpolation for every file
+    with instrumentation.stage('directory walk'):
+        pairs = find_usd_files(input_folder, output_folder, output_extension, crate_threshold)
+    instrumentation.count('directory walk', items=len(pairs))
+    # Outputs newer than their inputs were converted by a previous run and are left alone
+    pending = [(input_file, output_file) for input_file, output_file in pairs if force or not is_up_to_date(input_file, output_file)]
+    skipped = len(pairs) - len(pending)
+
+    results = []
+    failures = []
+    start = time.perf_counter()
+    for output_file in {os.path.dirname(output_file) for _, output_file in pending}:
+        os.makedirs(output_file, exist_ok=True)
+    with concurrent.futures.ProcessPoolExecutor(max_workers=jobs) as executor:
+        futures = [
+            executor.submit(convert_file_worker, input_file, output_file, options, instrumentation.enabled())
+            for input_file, output_file in pending
+        ]
+        for future in concurrent.futures.as_completed(futures):
+            input_file, output_file, elapsed, error, stages = future.result()
+            instrumentation.merge(stages)
+            if error:
+                failures.append((input_file, elapsed, error))
+                logging.error(f"Failed to process {input_file}: {error}")
+            else:
+                results.append((input_file, elapsed))
+                logging.info(f"Processed file: {input_file} -> {output_file} ({elapsed:.2f}s)")
+
+    # Per-file report, slowest files first
+    logging.info(f"Converted {len(results)} files, skipped {skipped} up-to-date, {len(failures)} failed in {time.perf_counter() - start:.2f}s")
+    for input_file, elapsed in sorted(results, key=lambda result: result[1], reverse=True):
+        logging.info(f"  - {input_file}: {elapsed:.2f}s")
+    for input_file, elapsed, error in failures:
+        logging.info(f"  - {input_file}: FAILED after {elapsed:.2f}s ({error})")
+    return not failures
+
+
+def main(args):
+    # Runs RemixMeshConvert for the arguments parsed by rtxremixtools.meshconvert.cli
+    input_path = args.input
+    output_path = args.output
+    output_extension = args.format
+
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+
+    options = dict(
+        weld=args.weld,
+        weld_epsilon=args.weld_epsilon,
+        stream=args.stream,
+        batch_size=max(1, args.batch_size),
+        memory_budget=args.memory_budget * 1024 * 1024 if args.memory_budget else None,
+    )
+
+    if os.path.isdir(input_path):
+        if not process_folder(input_path, output_path, output_extension, args.jobs, args.force,
+                              args.crate_threshold if args.crate_threshold >= 0 else None, **options):
+            return 1
+    else:
+        if output_extension:
+            output_path = os.path.splitext(output_path)[0] + '.' + output_extension
+        convert_file(input_path, output_path, **options)
+        logging.info(f"Processed file: {input_path} -> {output_path}")